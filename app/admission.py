@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Tuple, TypeVar
+
+from fastapi import HTTPException, Request
+
+from app import config
+from app.profiling import current_profile
+
+T = TypeVar("T")
+
+
+# Bounded executor for blocking database work, instead of the loop's default.
+db_executor = ThreadPoolExecutor(
+    max_workers=config.DB_MAX_WORKERS, thread_name_prefix="db"
+)
+
+
+async def run_db(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run `func` on the database executor, like `asyncio.to_thread` does on the
+    default one. Context variables are propagated to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args)
+    if profile := current_profile.get():
+        call = profile.wrap(call)
+    return await loop.run_in_executor(db_executor, call)
+
+
+class Admission:
+    """
+    Concurrency limit for a class of routes. At most `limit` calls run at once
+    and at most `queue_size` wait. A call waiting longer than `queue_timeout`
+    seconds, or arriving when the queue is full, is rejected with a 503.
+    """
+
+    def __init__(
+        self, name: str, limit: int, queue_size: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def reject(self, reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name}: {reason}). Try again later.",
+            headers={"Retry-After": str(math.ceil(self.queue_timeout))},
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        semaphore = self.semaphore
+        if semaphore.locked():
+            if self.waiting >= self.queue_size:
+                raise self.reject("queue full")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self.reject("queue timeout")
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        try:
+            return await run_db(func, *args)
+        finally:
+            semaphore.release()
+
+
+# Expensive list queries must not starve cheap lookups, so each kind of route
+# gets its own pool.
+list_admission = Admission(
+    "list",
+    config.ADMISSION_LIST_LIMIT,
+    config.ADMISSION_LIST_QUEUE,
+    config.ADMISSION_LIST_TIMEOUT,
+)
+item_admission = Admission(
+    "item",
+    config.ADMISSION_ITEM_LIMIT,
+    config.ADMISSION_ITEM_QUEUE,
+    config.ADMISSION_ITEM_TIMEOUT,
+)
+write_admission = Admission(
+    "write",
+    config.ADMISSION_WRITE_LIMIT,
+    config.ADMISSION_WRITE_QUEUE,
+    config.ADMISSION_WRITE_TIMEOUT,
+)
+
+
+class RateLimit:
+    """
+    Per-client token bucket, kept in process. Each client gets `rate` tokens
+    per second up to `burst`; a request without a token gets a 429. Only the
+    `max_clients` most recently seen clients are tracked.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    async def __call__(self, request: Request) -> None:
+        if self.rate <= 0:
+            return None
+        client = request.client.host if request.client else "unknown"
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets[client] = (tokens, now)
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests.",
+                headers={"Retry-After": str(math.ceil((1 - tokens) / self.rate))},
+            )
+        self.buckets[client] = (tokens - 1, now)
+        if len(self.buckets) > self.max_clients:
+            self.buckets.popitem(last=False)
+        return None
+
+
+rate_limit = RateLimit(
+    config.RATE_LIMIT_PER_SECOND,
+    config.RATE_LIMIT_BURST,
+    config.RATE_LIMIT_MAX_CLIENTS,
+)
@@ -0,0 +1,66 @@
+"""add assignment autoincrement
+
+Revision ID: add_assignment_autoincrement
+Revises: add_assignment_submission_date_index
+Create Date: 2026-10-19 00:00:00.000000
+
+Rebuilds the assignment table with AUTOINCREMENT, so ids freed by the archive
+job are not reused. The sequence starts at the largest id left in the table;
+`archive_assignments` raises it past the archived ids on its next run.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_assignment_autoincrement'
+down_revision = 'add_assignment_submission_date_index'
+branch_labels = None
+depends_on = None
+
+# Rebuilding the assignment table drops its triggers; recreated from
+# add_counter_columns.
+ASSIGNMENT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_insert
+    AFTER INSERT ON assignment
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count + 1
+        WHERE id = NEW.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_delete
+    AFTER DELETE ON assignment
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count - 1
+        WHERE id = OLD.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_update
+    AFTER UPDATE OF student_id ON assignment
+    WHEN OLD.student_id IS NOT NEW.student_id
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count - 1
+        WHERE id = OLD.student_id;
+        UPDATE user_account SET assignment_count = assignment_count + 1
+        WHERE id = NEW.student_id;
+    END
+    """,
+]
+
+def rebuild(autoincrement):
+    with op.batch_alter_table(
+        'assignment',
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement},
+    ):
+        pass
+    for trigger in ASSIGNMENT_TRIGGERS:
+        op.execute(trigger)
+
+def upgrade():
+    rebuild(True)
+
+def downgrade():
+    rebuild(False)
@@ -0,0 +1,104 @@
+"""add assignment body table
+
+Revision ID: add_assignment_body_table
+Revises: add_counter_columns
+Create Date: 2026-10-19 00:00:00.000000
+
+Schema only. Existing bodies stay inline; `python -m app.bodies repack` moves
+them into the store, following BODY_STORE_ENABLED, BODY_STORE_MIN_SIZE and
+the configured compression level.
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_assignment_body_table'
+down_revision = 'add_counter_columns'
+branch_labels = None
+depends_on = None
+
+assignment = sa.table(
+    'assignment',
+    sa.column('id', sa.Integer),
+    sa.column('body', sa.Text),
+    sa.column('body_hash', sa.String),
+)
+assignment_body = sa.table(
+    'assignment_body',
+    sa.column('hash', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('size', sa.Integer),
+)
+
+# Rebuilding the assignment table drops its triggers; recreated from
+# add_counter_columns.
+ASSIGNMENT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_insert
+    AFTER INSERT ON assignment
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count + 1
+        WHERE id = NEW.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_delete
+    AFTER DELETE ON assignment
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count - 1
+        WHERE id = OLD.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS user_account_assignment_count_update
+    AFTER UPDATE OF student_id ON assignment
+    WHEN OLD.student_id IS NOT NEW.student_id
+    BEGIN
+        UPDATE user_account SET assignment_count = assignment_count - 1
+        WHERE id = OLD.student_id;
+        UPDATE user_account SET assignment_count = assignment_count + 1
+        WHERE id = NEW.student_id;
+    END
+    """,
+]
+
+def upgrade():
+    op.create_table(
+        'assignment_body',
+        sa.Column('hash', sa.String(length=64), primary_key=True),
+        sa.Column('data', sa.LargeBinary, nullable=False),
+        sa.Column('size', sa.Integer, nullable=False),
+    )
+    with op.batch_alter_table('assignment') as batch_op:
+        batch_op.alter_column('body', existing_type=sa.Text, nullable=True)
+        batch_op.add_column(
+            sa.Column(
+                'body_hash',
+                sa.String(length=64),
+                sa.ForeignKey(
+                    'assignment_body.hash', name='fk_assignment_body_hash'
+                ),
+                nullable=True,
+            )
+        )
+    for trigger in ASSIGNMENT_TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade():
+    connection = op.get_bind()
+    for row in connection.execute(sa.select(assignment_body)).all():
+        connection.execute(
+            assignment.update()
+            .where(assignment.c.body_hash == row.hash)
+            .values(body=zlib.decompress(row.data).decode())
+        )
+    with op.batch_alter_table('assignment') as batch_op:
+        batch_op.drop_column('body_hash')
+        batch_op.alter_column('body', existing_type=sa.Text, nullable=False)
+    for trigger in ASSIGNMENT_TRIGGERS:
+        op.execute(trigger)
+    op.drop_table('assignment_body')
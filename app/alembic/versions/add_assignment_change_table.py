@@ -0,0 +1,37 @@
+"""add assignment change table
+
+Revision ID: add_assignment_change_table
+Revises: add_assignment_table
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_assignment_change_table'
+down_revision = 'add_assignment_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'assignment_change',
+        sa.Column('seq', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('action', sa.String(length=16), nullable=False),
+        sa.Column('assignment_id', sa.Integer, nullable=False),
+        sa.Column('classroom_id', sa.Integer, nullable=False),
+        sa.Column('data', sa.JSON, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+    )
+    op.create_index(
+        'ix_assignment_change_classroom_id_seq',
+        'assignment_change',
+        ['classroom_id', 'seq'],
+    )
+
+def downgrade():
+    op.drop_index(
+        'ix_assignment_change_classroom_id_seq', table_name='assignment_change'
+    )
+    op.drop_table('assignment_change')
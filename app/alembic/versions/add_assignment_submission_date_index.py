@@ -0,0 +1,23 @@
+"""add assignment submission date index
+
+Revision ID: add_assignment_submission_date_index
+Revises: add_assignment_body_table
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_assignment_submission_date_index'
+down_revision = 'add_assignment_body_table'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Lets the archive job find old assignments without a full scan.
+    op.create_index(
+        'ix_assignment_submission_date', 'assignment', ['submission_date']
+    )
+
+def downgrade():
+    op.drop_index('ix_assignment_submission_date', table_name='assignment')
@@ -0,0 +1,76 @@
+"""add counter columns
+
+Revision ID: add_counter_columns
+Revises: add_assignment_change_table
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_counter_columns'
+down_revision = 'add_assignment_change_table'
+branch_labels = None
+depends_on = None
+
+# (trigger name, counted rows, counter table, counter column, key)
+COUNTERS = [
+    ('school_classroom_count', 'classroom', 'school', 'classroom_count', 'school_id'),
+    ('school_user_count', 'user_account', 'school', 'user_count', 'school_id'),
+    (
+        'classroom_member_count',
+        'classroom_user_account_table',
+        'classroom',
+        'member_count',
+        'classroom_id',
+    ),
+    (
+        'user_account_assignment_count',
+        'assignment',
+        'user_account',
+        'assignment_count',
+        'student_id',
+    ),
+]
+
+def upgrade():
+    for _, table, counted, column, key in COUNTERS:
+        op.add_column(
+            counted,
+            sa.Column(column, sa.Integer, nullable=False, server_default='0'),
+        )
+        op.execute(
+            f'UPDATE {counted} SET {column} = '
+            f'(SELECT count(*) FROM {table} WHERE {table}.{key} = {counted}.id)'
+        )
+    for name, table, counted, column, key in COUNTERS:
+        op.execute(f"""
+            CREATE TRIGGER {name}_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE {counted} SET {column} = {column} + 1 WHERE id = NEW.{key};
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {name}_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE {counted} SET {column} = {column} - 1 WHERE id = OLD.{key};
+            END
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {name}_update AFTER UPDATE OF {key} ON {table}
+            WHEN OLD.{key} IS NOT NEW.{key}
+            BEGIN
+                UPDATE {counted} SET {column} = {column} - 1 WHERE id = OLD.{key};
+                UPDATE {counted} SET {column} = {column} + 1 WHERE id = NEW.{key};
+            END
+        """)
+
+def downgrade():
+    # All triggers go first: rebuilding a table fails while others refer to it.
+    for name, *_ in COUNTERS:
+        for event in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}_{event}')
+    for _, _, counted, column, _ in COUNTERS:
+        with op.batch_alter_table(counted) as batch_op:
+            batch_op.drop_column(column)
@@ -1,15 +1,32 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse
 
-from app.db import Base, engine
-from app.routers import classroom_router, school_router, user_router
-from app.routers.assignment_router import assignment_router  # <-- Added
+from app import config
+from app.admission import rate_limit
+from app.db import Base, SessionLocal, archive_metadata, engine
+from app.exceptions import MissingBodyError
+from app.membership import membership_index
+from app.profiling import ProfilingMiddleware
+from app.routers import (
+    assignment_router,
+    classroom_router,
+    debug_router,
+    school_router,
+    user_router,
+)
+from app.slowlog import track_route
 
 
 Base.metadata.create_all(bind=engine)
+if config.ARCHIVE_PATH:
+    archive_metadata.create_all(bind=engine)
+if config.MEMBERSHIP_CHECK:
+    with SessionLocal() as database:
+        membership_index.load(database)
 
-app = FastAPI()
+app = FastAPI(dependencies=[Depends(rate_limit), Depends(track_route)])
 
 
 app.add_middleware(
@@ -19,12 +36,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Small payloads are not worth the CPU; event streams are never buffered.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=config.GZIP_MINIMUM_SIZE,
+    compresslevel=config.GZIP_COMPRESS_LEVEL,
+)
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.exception_handler(MissingBodyError)
+async def missing_body_handler(request: Request, exc: MissingBodyError) -> JSONResponse:
+    # Data loss: fail loudly rather than serve an empty body.
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
 
 # routers
 app.include_router(school_router)
 app.include_router(classroom_router)
 app.include_router(user_router)
-app.include_router(assignment_router)  # <-- Added
+app.include_router(assignment_router)
+app.include_router(debug_router)
 
 # Root redirect to docs
 @app.get("/")
@@ -0,0 +1,120 @@
+"""
+Move old assignments into the archive database.
+
+    $ ARCHIVE_PATH=./archive.db uv run python -m app.archive [cutoff days]
+
+Each batch is moved in its own transaction, oldest ids first, so the job can
+be interrupted and rerun; it picks up where it stopped.
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    Connection,
+    DateTime,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import Assignment, SessionLocal, archive_metadata, archived_assignment_table
+
+
+def archive_attached(connection: Connection) -> bool:
+    databases = connection.execute(text("PRAGMA database_list")).all()
+    return any(database.name == "archive" for database in databases)
+
+
+def reserve_archived_ids(database: Session) -> None:
+    """
+    Raise the assignment id sequence past every archived id. AUTOINCREMENT
+    keeps new ids above those it handed out, but archives made before the
+    table had it can hold ids above the sequence.
+    """
+    top = database.scalar(select(func.max(archived_assignment_table.c.id)))
+    if top is None:
+        return
+    params = {"top": top}
+    database.execute(
+        text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'assignment', :top "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'assignment')"
+        ),
+        params,
+    )
+    database.execute(
+        text(
+            "UPDATE sqlite_sequence SET seq = :top "
+            "WHERE name = 'assignment' AND seq < :top"
+        ),
+        params,
+    )
+
+
+def archive_assignments(
+    database: Session, before: datetime, batch_size: int = config.ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Move assignments submitted before `before` to the archive. Returns the
+    number of assignments moved.
+    """
+    archive_metadata.create_all(database.connection())
+    reserve_archived_ids(database)
+    database.commit()
+    columns = [
+        Assignment.id,
+        Assignment.title,
+        Assignment.inline_body,
+        Assignment.body_hash,
+        Assignment.submission_date,
+        Assignment.classroom_id,
+        Assignment.student_id,
+    ]
+    archived = archived_assignment_table.c
+    moved = 0
+    while True:
+        ids = database.scalars(
+            select(Assignment.id)
+            .where(Assignment.submission_date < before)
+            .order_by(Assignment.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return moved
+        database.execute(
+            insert(archived_assignment_table).from_select(
+                [
+                    archived.id,
+                    archived.title,
+                    archived.body,
+                    archived.body_hash,
+                    archived.submission_date,
+                    archived.classroom_id,
+                    archived.student_id,
+                    archived.archived_at,
+                ],
+                select(*columns, literal(datetime.utcnow(), DateTime)).where(
+                    Assignment.id.in_(ids)
+                ),
+            )
+        )
+        database.execute(
+            delete(Assignment).where(Assignment.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        database.commit()
+        moved += len(ids)
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else config.ARCHIVE_CUTOFF_DAYS
+    with SessionLocal() as session:
+        if not archive_attached(session.connection()):
+            sys.exit("Set ARCHIVE_PATH to archive assignments.")
+        print(archive_assignments(session, datetime.utcnow() - timedelta(days=days)))
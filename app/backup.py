@@ -0,0 +1,145 @@
+"""
+Online backup of the database with SQLite's backup API.
+
+    $ uv run python -m app.backup [target]
+    $ uv run python -m app.backup --restore <backup> <target>
+
+Pages are copied `BACKUP_PAGES` at a time and the source is unlocked for
+`BACKUP_SLEEP_MS` between steps, so the service keeps serving writes while
+the snapshot is taken. A write that lands mid-copy makes SQLite restart the
+copy from the beginning; each restart doubles the pages per step, up to
+`BACKUP_MAX_PAGES`, so a busy database is copied in fewer, still bounded,
+steps. The source is never locked for a whole-database copy: after
+`BACKUP_MAX_RESTARTS` restarts the backup fails and can be retried.
+Snapshots are never overwritten.
+Only the main database is copied, not an attached archive.
+
+A restore never overwrites: it checks the backup's integrity and copies it
+into a new file, which is then swapped in with the service stopped.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict
+
+from app import config
+from app.db import engine
+from app.exceptions import BackupError
+
+backup_lock = threading.Lock()
+
+
+class Restarted(Exception):
+    pass
+
+
+def snapshot_path(directory: str = config.BACKUP_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"app-{datetime.utcnow():%Y%m%dT%H%M%S%f}.db")
+
+
+def copy_database(
+    source: str,
+    target: str,
+    pages: int = config.BACKUP_PAGES,
+    sleep: float = config.BACKUP_SLEEP_MS / 1000,
+    max_restarts: int = config.BACKUP_MAX_RESTARTS,
+    max_pages: int = config.BACKUP_MAX_PAGES,
+) -> Dict[str, Any]:
+    """
+    Copy `source` to `target`, which must not exist, page by page. Writes to
+    a `.partial` file first, so `target` only ever holds a complete copy.
+    """
+    if os.path.exists(target):
+        raise BackupError(f"{target} already exists")
+    partial = f"{target}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    restarts = 0
+    last_remaining = None
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal last_remaining
+        # Every step shrinks `remaining` unless the copy started over.
+        if last_remaining is not None and remaining >= last_remaining:
+            raise Restarted
+        last_remaining = remaining
+        if remaining:
+            time.sleep(sleep)
+
+    start = time.perf_counter()
+    try:
+        with closing(sqlite3.connect(source, timeout=30)) as source_connection:
+            with closing(sqlite3.connect(partial)) as target_connection:
+                while True:
+                    try:
+                        source_connection.backup(
+                            target_connection, pages=pages, progress=progress
+                        )
+                        break
+                    except Restarted:
+                        restarts += 1
+                        if restarts > max_restarts:
+                            raise BackupError(
+                                f"Gave up after {max_restarts} restarts;"
+                                " the database is too busy"
+                            )
+                        last_remaining = None
+                        pages = min(pages * 2, max_pages)
+        # A hard link fails if `target` appeared meanwhile; os.replace would
+        # silently overwrite it.
+        os.link(partial, target)
+    except FileExistsError:
+        raise BackupError(f"{target} already exists") from None
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return {
+        "path": target,
+        "size": os.path.getsize(target),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        "restarts": restarts,
+        "pages": pages,
+    }
+
+
+def backup(target: str = "", **options: Any) -> Dict[str, Any]:
+    """
+    Snapshot the live database. Only one backup runs at a time.
+    """
+    if not backup_lock.acquire(blocking=False):
+        raise BackupError("A backup is already running")
+    try:
+        return copy_database(engine.url.database, target or snapshot_path(), **options)
+    finally:
+        backup_lock.release()
+
+
+def restore(source: str, target: str) -> Dict[str, Any]:
+    """
+    Check a backup and copy it into `target`, which must not exist yet.
+    """
+    if os.path.exists(target):
+        raise BackupError(f"{target} already exists")
+    with closing(sqlite3.connect(f"file:{source}?mode=ro", uri=True)) as connection:
+        result = connection.execute("PRAGMA integrity_check").fetchone()[0]
+    if result != "ok":
+        raise BackupError(f"{source} failed the integrity check: {result}")
+    return copy_database(source, target, pages=-1, sleep=0)
+
+
+if __name__ == "__main__":
+    try:
+        if sys.argv[1:2] == ["--restore"]:
+            if len(sys.argv) != 4:
+                sys.exit("Usage: python -m app.backup --restore <backup> <target>")
+            print(restore(sys.argv[2], sys.argv[3]))
+        else:
+            print(backup(sys.argv[1] if len(sys.argv) > 1 else ""))
+    except BackupError as e:
+        sys.exit(str(e))
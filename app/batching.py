@@ -0,0 +1,112 @@
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app import config
+from app.admission import Admission, write_admission
+from app.db import SessionLocal
+from app.exceptions import ServiceException
+from app.schemas import AssignmentModel, AssignmentPostModel
+from app.services import AssignmentService
+
+
+class AssignmentBatcher:
+    """
+    Group commit for assignment creation. Creates arriving within `window`
+    seconds of each other (up to `max_size`) are written by
+    `AssignmentService.create_many` in one transaction, so a burst pays for
+    one commit instead of one per request. Each caller awaits its own result,
+    and a row that fails raises `ServiceException` for that caller only.
+
+    Batches are written one at a time under `admission`; the next one gathers
+    while the previous commits. At most `max_queued` creates wait, gathering
+    or in batches not yet written; beyond that, and when admission rejects a
+    batch, callers get its 503.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_size: int,
+        max_queued: int,
+        session_factory: sessionmaker = SessionLocal,
+        admission: Admission = write_admission,
+    ) -> None:
+        self.window = window
+        self.max_size = max_size
+        self.max_queued = max_queued
+        self.session_factory = session_factory
+        self.admission = admission
+        self.queued = 0
+        self.pending: List[Tuple[AssignmentPostModel, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: Set[asyncio.Task] = set()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def create(self, data: AssignmentPostModel) -> AssignmentModel:
+        if self.queued >= self.max_queued:
+            raise self.admission.reject("batch queue full")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queued += 1
+        self.pending.append((data, future))
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self.write(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def write(self, batch: List[Tuple[AssignmentPostModel, asyncio.Future]]):
+        try:
+            async with self.lock:
+                results = await self.admission.run(
+                    self.create_many, [data for data, _ in batch]
+                )
+        except HTTPException as exception:
+            results = [exception] * len(batch)
+        except Exception:
+            results = [ServiceException("Could not create assignment")] * len(batch)
+        finally:
+            self.queued -= len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # The caller went away.
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def create_many(self, data: List[AssignmentPostModel]):
+        with self.session_factory() as database:
+            return AssignmentService(database).create_many(data)
+
+
+assignment_batcher = AssignmentBatcher(
+    config.ASSIGNMENT_BATCH_WINDOW_MS / 1000,
+    config.ASSIGNMENT_BATCH_MAX_SIZE,
+    config.ASSIGNMENT_BATCH_MAX_QUEUED,
+)
@@ -0,0 +1,100 @@
+"""
+Maintenance of the assignment body store.
+
+    $ uv run python -m app.bodies repack   # move inline bodies into the store
+    $ uv run python -m app.bodies prune    # delete bodies no longer referenced
+
+`repack` commits per batch, so it can be interrupted and rerun. Archived
+assignments keep their bodies in this store, so `prune` needs the archive
+attached (`ARCHIVE_PATH`); pass `--without-archive` only if none exists.
+"""
+
+import sys
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app import config
+from app.archive import archive_attached
+from app.db import (
+    Assignment,
+    AssignmentBody,
+    SessionLocal,
+    archived_assignment_table,
+    body_values,
+    store_bodies,
+)
+from app.exceptions import BodyStoreError
+
+
+def repack(database: Session, batch_size: int = 1000) -> int:
+    """
+    Move inline bodies of at least `BODY_STORE_MIN_SIZE` into the store.
+    Returns the number of assignments moved.
+    """
+    if not config.BODY_STORE_ENABLED:
+        return 0
+    moved = 0
+    last_id = 0
+    while True:
+        rows = database.execute(
+            select(Assignment.id, Assignment.inline_body)
+            .where(Assignment.id > last_id, Assignment.inline_body.is_not(None))
+            .order_by(Assignment.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return moved
+        last_id = rows[-1].id
+        values, stored = [], []
+        for row in rows:
+            body, body_stored = body_values(row.inline_body)
+            if body_stored:
+                stored.append(body_stored)
+                values.append({"id": row.id, **body})
+        store_bodies(database, stored)
+        if values:
+            database.execute(update(Assignment), values)
+        database.commit()
+        moved += len(values)
+
+
+def prune(database: Session, without_archive: bool = False) -> int:
+    """
+    Delete stored bodies no assignment, current or archived, refers to.
+    Refuses to run without the archive attached, unless `without_archive`
+    says there is none. Returns the number deleted.
+    """
+    referenced = select(Assignment.body_hash).where(Assignment.body_hash.is_not(None))
+    if archive_attached(database.connection()):
+        archived = archived_assignment_table.c
+        referenced = referenced.union(
+            select(archived.body_hash).where(archived.body_hash.is_not(None))
+        )
+    elif not without_archive:
+        raise BodyStoreError(
+            "The archive is not attached, so bodies of archived assignments"
+            " cannot be kept. Set ARCHIVE_PATH, or pass --without-archive if"
+            " there is no archive."
+        )
+    result = database.execute(
+        delete(AssignmentBody).where(AssignmentBody.hash.not_in(referenced))
+    )
+    database.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    with SessionLocal() as session:
+        try:
+            if args == ["repack"]:
+                print(repack(session))
+            elif args in (["prune"], ["prune", "--without-archive"]):
+                print(prune(session, without_archive=len(args) == 2))
+            else:
+                sys.exit(
+                    "usage: python -m app.bodies {repack|prune [--without-archive]}"
+                )
+        except BodyStoreError as e:
+            sys.exit(str(e))
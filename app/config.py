@@ -0,0 +1,151 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name, default)
+
+
+# Database
+
+DATABASE_URL = _env_str("DATABASE_URL", "sqlite:///./app.db")
+# Compiled SQL statements kept per engine.
+SQL_QUERY_CACHE_SIZE = _env_int("SQL_QUERY_CACHE_SIZE", 500)
+
+
+# Compression
+
+# Responses smaller than this many bytes are sent uncompressed.
+GZIP_MINIMUM_SIZE = _env_int("GZIP_MINIMUM_SIZE", 1024)
+GZIP_COMPRESS_LEVEL = _env_int("GZIP_COMPRESS_LEVEL", 6)
+
+
+# Cache-Control policies, applied to GET/HEAD. Writes are always no-store.
+
+CACHE_CONTROL_SCHOOL = _env_str("CACHE_CONTROL_SCHOOL", "public, max-age=3600")
+# The school tree carries members' emails and changes with every enrolment.
+CACHE_CONTROL_SCHOOL_TREE = _env_str("CACHE_CONTROL_SCHOOL_TREE", "private, no-store")
+CACHE_CONTROL_CLASSROOM = _env_str("CACHE_CONTROL_CLASSROOM", "private, max-age=60")
+CACHE_CONTROL_USER = _env_str("CACHE_CONTROL_USER", "private, no-cache")
+CACHE_CONTROL_ASSIGNMENT = _env_str("CACHE_CONTROL_ASSIGNMENT", "private, no-cache")
+
+
+# Admission control
+
+# Worker threads for blocking database calls.
+DB_MAX_WORKERS = _env_int("DB_MAX_WORKERS", 8)
+
+# Per pool: concurrent calls, queued calls, and seconds a call may queue. The
+# pool limits add up to DB_MAX_WORKERS so no pool can take every worker.
+ADMISSION_LIST_LIMIT = _env_int("ADMISSION_LIST_LIMIT", 2)
+ADMISSION_LIST_QUEUE = _env_int("ADMISSION_LIST_QUEUE", 16)
+ADMISSION_LIST_TIMEOUT = _env_float("ADMISSION_LIST_TIMEOUT", 2.0)
+ADMISSION_ITEM_LIMIT = _env_int("ADMISSION_ITEM_LIMIT", 4)
+ADMISSION_ITEM_QUEUE = _env_int("ADMISSION_ITEM_QUEUE", 64)
+ADMISSION_ITEM_TIMEOUT = _env_float("ADMISSION_ITEM_TIMEOUT", 1.0)
+ADMISSION_WRITE_LIMIT = _env_int("ADMISSION_WRITE_LIMIT", 2)
+ADMISSION_WRITE_QUEUE = _env_int("ADMISSION_WRITE_QUEUE", 64)
+ADMISSION_WRITE_TIMEOUT = _env_float("ADMISSION_WRITE_TIMEOUT", 2.0)
+
+# Token bucket per client address. A rate of 0 disables rate limiting.
+RATE_LIMIT_PER_SECOND = _env_float("RATE_LIMIT_PER_SECOND", 20.0)
+RATE_LIMIT_BURST = _env_int("RATE_LIMIT_BURST", 40)
+RATE_LIMIT_MAX_CLIENTS = _env_int("RATE_LIMIT_MAX_CLIENTS", 10000)
+
+
+# Assignment change feed
+
+# Changes buffered per subscriber before it is asked to reconnect.
+SSE_QUEUE_SIZE = _env_int("SSE_QUEUE_SIZE", 1000)
+# Seconds between keep-alive comments on an idle stream.
+SSE_KEEPALIVE = _env_float("SSE_KEEPALIVE", 15.0)
+# Changes read per page when a client catches up.
+SSE_CATCH_UP_LIMIT = _env_int("SSE_CATCH_UP_LIMIT", 10000)
+
+
+# Assignment write batching
+
+# Creates arriving within this many milliseconds are committed together.
+# 0 disables batching.
+ASSIGNMENT_BATCH_WINDOW_MS = _env_float("ASSIGNMENT_BATCH_WINDOW_MS", 0)
+ASSIGNMENT_BATCH_MAX_SIZE = _env_int("ASSIGNMENT_BATCH_MAX_SIZE", 500)
+# Creates waiting for a batch at most; more are rejected with a 503. Batches
+# are written under write admission.
+ASSIGNMENT_BATCH_MAX_QUEUED = _env_int("ASSIGNMENT_BATCH_MAX_QUEUED", 2000)
+
+
+# Assignment body store
+
+# Keep assignment bodies out of the assignment table, compressed and
+# deduplicated. Bodies shorter than BODY_STORE_MIN_SIZE characters stay inline.
+BODY_STORE_ENABLED = _env_bool("BODY_STORE_ENABLED", False)
+BODY_STORE_MIN_SIZE = _env_int("BODY_STORE_MIN_SIZE", 256)
+BODY_STORE_COMPRESS_LEVEL = _env_int("BODY_STORE_COMPRESS_LEVEL", 6)
+
+
+# Assignment archive
+
+# SQLite file attached as the `archive` schema. Empty disables archiving.
+ARCHIVE_PATH = _env_str("ARCHIVE_PATH", "")
+# Assignments submitted more than this many days ago are archived.
+ARCHIVE_CUTOFF_DAYS = _env_int("ARCHIVE_CUTOFF_DAYS", 365)
+ARCHIVE_BATCH_SIZE = _env_int("ARCHIVE_BATCH_SIZE", 1000)
+
+
+# Slow query log
+
+# Statements taking at least this many milliseconds are logged. A negative
+# value disables the log.
+SLOW_QUERY_MS = _env_float("SLOW_QUERY_MS", 100.0)
+# JSON lines log file, rotated by size. Empty keeps the summary in memory only.
+SLOW_QUERY_LOG = _env_str("SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = _env_int("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024)
+SLOW_QUERY_LOG_BACKUPS = _env_int("SLOW_QUERY_LOG_BACKUPS", 5)
+# Distinct statements kept in the in-memory summary.
+SLOW_QUERY_MAX_STATEMENTS = _env_int("SLOW_QUERY_MAX_STATEMENTS", 200)
+
+
+# Debug endpoints
+
+# Required in the X-Debug-Token header of /debug requests. Empty disables them.
+DEBUG_TOKEN = _env_str("DEBUG_TOKEN", "")
+
+
+# Online backup
+
+BACKUP_DIR = _env_str("BACKUP_DIR", "backups")
+# Pages copied per step; the source is unlocked for BACKUP_SLEEP_MS between
+# steps so writers can get in.
+BACKUP_PAGES = _env_int("BACKUP_PAGES", 256)
+BACKUP_SLEEP_MS = _env_float("BACKUP_SLEEP_MS", 10.0)
+# A write to the source restarts the copy with twice the pages per step, up
+# to BACKUP_MAX_PAGES; after this many restarts the backup fails.
+BACKUP_MAX_RESTARTS = _env_int("BACKUP_MAX_RESTARTS", 5)
+BACKUP_MAX_PAGES = _env_int("BACKUP_MAX_PAGES", 4096)
+
+# Membership index
+
+# Validate assignment writes against the in-process membership index. A miss
+# is confirmed against the database, so memberships added by another worker
+# or a restore are still accepted.
+MEMBERSHIP_CHECK = _env_bool("MEMBERSHIP_CHECK", True)
+
+# Request profiling
+
+# Fraction of requests profiled. Requests sending X-Profile with DEBUG_TOKEN
+# are always profiled.
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_INTERVAL_MS = _env_float("PROFILE_INTERVAL_MS", 1.0)
+# Profiles kept for /debug/profiles.
+PROFILE_KEEP = _env_int("PROFILE_KEEP", 50)
@@ -0,0 +1,55 @@
+"""
+Recompute the denormalized counters in bulk.
+
+The counter triggers in `app.db` keep them exact, so this is only needed
+after the triggers were bypassed, e.g. rows written before the migration
+that added them or a database restored from elsewhere.
+
+    $ uv run python -m app.counters
+"""
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db import (
+    Assignment,
+    Classroom,
+    School,
+    SessionLocal,
+    UserAccount,
+    classroom_user_account_table,
+)
+
+
+def recompute_counters(database: Session) -> None:
+    member = classroom_user_account_table.c
+    database.execute(
+        update(School).values(
+            classroom_count=select(func.count())
+            .where(Classroom.school_id == School.id)
+            .scalar_subquery(),
+            user_count=select(func.count())
+            .where(UserAccount.school_id == School.id)
+            .scalar_subquery(),
+        )
+    )
+    database.execute(
+        update(Classroom).values(
+            member_count=select(func.count())
+            .where(member.classroom_id == Classroom.id)
+            .scalar_subquery()
+        )
+    )
+    database.execute(
+        update(UserAccount).values(
+            assignment_count=select(func.count())
+            .where(Assignment.student_id == UserAccount.id)
+            .scalar_subquery()
+        )
+    )
+    database.commit()
+
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        recompute_counters(session)
@@ -1,19 +1,83 @@
-from typing import List
+import hashlib
+import logging
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, String, Table, create_engine
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Column,
+    DateTime,
+    Engine,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    event,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
+    Session,
     configure_mappers,
     mapped_column,
     relationship,
     sessionmaker,
 )
 
+from app import config
+from app.exceptions import MissingBodyError
+from app.slowlog import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+
+def enable_savepoints(engine: Engine) -> None:
+    """
+    Let SQLAlchemy emit BEGIN instead of pysqlite, whose implicit transaction
+    handling breaks SAVEPOINT and so `Session.begin_nested`.
+    """
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
 
-engine = create_engine("sqlite:///./app.db", connect_args={"check_same_thread": False})
+
+engine = create_engine(
+    config.DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    query_cache_size=config.SQL_QUERY_CACHE_SIZE,
+)
+enable_savepoints(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if config.SLOW_QUERY_MS >= 0:
+    slow_query_log.install(engine)
+
+
+def attach_archive(engine: Engine, path: str) -> None:
+    """
+    Attach the archive database at `path` as schema `archive` on every
+    connection of `engine`.
+    """
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ? AS archive", (path,))
+
+
+if config.ARCHIVE_PATH:
+    attach_archive(engine, config.ARCHIVE_PATH)
+
 # Base declarative class
 class Base(DeclarativeBase):
     pass
@@ -37,6 +101,8 @@ class School(Base):
     __tablename__ = "school"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     name: Mapped[str] = mapped_column(String(255), unique=True)
+    classroom_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    user_count: Mapped[int] = mapped_column(default=0, server_default="0")
     classrooms: Mapped[List["Classroom"]] = relationship(back_populates="school")
     user_accounts: Mapped[List["UserAccount"]] = relationship(back_populates="school")
 
@@ -46,6 +112,7 @@ class Classroom(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     name: Mapped[str] = mapped_column(String(255), unique=True)
     school_id: Mapped[int] = mapped_column(ForeignKey("school.id", ondelete="CASCADE"))
+    member_count: Mapped[int] = mapped_column(default=0, server_default="0")
     school: Mapped["School"] = relationship(back_populates="classrooms")
     user_accounts: Mapped[List["UserAccount"]] = relationship(
         secondary=classroom_user_account_table, back_populates="classrooms"
@@ -64,6 +131,7 @@ class UserAccount(Base):
     school_id: Mapped[int] = mapped_column(
         ForeignKey("school.id", ondelete="SET NULL"), nullable=True
     )
+    assignment_count: Mapped[int] = mapped_column(default=0, server_default="0")
     school: Mapped["School"] = relationship(back_populates="user_accounts")
     classrooms: Mapped[List["Classroom"]] = relationship(
         secondary=classroom_user_account_table, back_populates="user_accounts"
@@ -75,10 +143,22 @@ class UserAccount(Base):
 # Assignment model
 class Assignment(Base):
     __tablename__ = "assignment"
+    # AUTOINCREMENT: ids of archived (deleted) rows are never handed out again.
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
     title: Mapped[str] = mapped_column(String(255))
-    body: Mapped[str] = mapped_column(String)  # simple text field
-    submission_date: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    # The body lives inline, or in the body store when body_hash is set. Use
+    # the `body` property, which reads and writes either transparently.
+    inline_body: Mapped[Optional[str]] = mapped_column("body", String, nullable=True)
+    body_hash: Mapped[Optional[str]] = mapped_column(
+        ForeignKey("assignment_body.hash"), nullable=True
+    )
+    stored_body: Mapped[Optional["AssignmentBody"]] = relationship(
+        viewonly=True, lazy="selectin"
+    )
+    submission_date: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, index=True
+    )
 
     classroom_id: Mapped[int] = mapped_column(ForeignKey("classroom.id", ondelete="CASCADE"))
     classroom: Mapped["Classroom"] = relationship("Classroom", back_populates="assignments")
@@ -86,6 +166,188 @@ class Assignment(Base):
     student_id: Mapped[int] = mapped_column(ForeignKey("user_account.id", ondelete="CASCADE"))
     student: Mapped["UserAccount"] = relationship("UserAccount", back_populates="assignments")
 
+    @property
+    def body(self) -> Optional[str]:
+        if self.body_hash is None:
+            return self.inline_body
+        cached = self.__dict__.get("_body_text")
+        if cached and cached[0] == self.body_hash:
+            return cached[1]
+        if self.stored_body is None:
+            # SQLite does not enforce the foreign key.
+            raise missing_body(self.id, self.body_hash)
+        return self.stored_body.text
+
+    @body.setter
+    def body(self, text: str) -> None:
+        values, stored = body_values(text)
+        self.inline_body = values["inline_body"]
+        self.body_hash = values["body_hash"]
+        self.__dict__.pop("_body_stored", None)
+        if stored:
+            # Written by `store_pending_bodies` before the next flush.
+            self._body_stored = stored
+            self._body_text = (stored["hash"], text)
+
+# Content-addressed body store: compressed, deduplicated by SHA-256
+class AssignmentBody(Base):
+    __tablename__ = "assignment_body"
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    size: Mapped[int]
+
+    @property
+    def text(self) -> str:
+        return self.decode(self.data)
+
+    @staticmethod
+    def decode(data: bytes) -> str:
+        return zlib.decompress(data).decode()
+
+
+def missing_body(assignment_id: int, body_hash: str) -> MissingBodyError:
+    """
+    Log a dangling `body_hash` and return the error to raise for it.
+    """
+    error = MissingBodyError(assignment_id, body_hash)
+    logger.error("%s", error)
+    return error
+
+
+def body_values(text: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Split a body into Assignment column values and, if it belongs in the
+    body store, the AssignmentBody row to store.
+    """
+    if not config.BODY_STORE_ENABLED or len(text) < config.BODY_STORE_MIN_SIZE:
+        return {"inline_body": text, "body_hash": None}, None
+    encoded = text.encode()
+    digest = hashlib.sha256(encoded).hexdigest()
+    stored = {
+        "hash": digest,
+        "data": zlib.compress(encoded, config.BODY_STORE_COMPRESS_LEVEL),
+        "size": len(encoded),
+    }
+    return {"inline_body": None, "body_hash": digest}, stored
+
+
+def store_bodies(database: Session, stored: List[Dict[str, Any]]) -> None:
+    """
+    Insert body store rows, skipping contents that are already stored.
+    """
+    if stored:
+        database.execute(
+            sqlite_insert(AssignmentBody).on_conflict_do_nothing(), stored
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def store_pending_bodies(session, flush_context, instances) -> None:
+    assignments = [
+        instance
+        for instance in (*session.new, *session.dirty)
+        if isinstance(instance, Assignment) and "_body_stored" in instance.__dict__
+    ]
+    store_bodies(session, [assignment._body_stored for assignment in assignments])
+    for assignment in assignments:
+        del assignment._body_stored
+
+# Assignment change log, the resumable source of the assignment event feed
+class AssignmentChange(Base):
+    __tablename__ = "assignment_change"
+    __table_args__ = (
+        Index("ix_assignment_change_classroom_id_seq", "classroom_id", "seq"),
+    )
+    seq: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    action: Mapped[str] = mapped_column(String(16))
+    # No foreign keys: entries outlive the assignments they describe.
+    assignment_id: Mapped[int]
+    classroom_id: Mapped[int]
+    data: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+# Archived assignments, in the attached archive database. Rows keep their
+# original ids; bodies stay in the body store of the main database.
+archive_metadata = MetaData(schema="archive")
+
+archived_assignment_table = Table(
+    "assignment",
+    archive_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String(255), nullable=False),
+    Column("body", String, nullable=True),
+    Column("body_hash", String(64), nullable=True),
+    Column("submission_date", DateTime, nullable=False),
+    Column("classroom_id", Integer, nullable=False, index=True),
+    Column("student_id", Integer, nullable=False, index=True),
+    Column("archived_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# Counter triggers
+#
+# School.classroom_count, School.user_count, Classroom.member_count and
+# UserAccount.assignment_count are kept exact by these triggers, so every write
+# path (services, ORM cascades, bulk inserts) maintains them. Use
+# `python -m app.counters` to recompute them in bulk. Archived assignments are
+# not counted.
+
+def _counter_triggers(name, table, counted, column, key):
+    """
+    Triggers keeping `counted.column` equal to the number of `table` rows whose
+    `key` points at it.
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE {counted} SET {column} = {column} + 1 WHERE id = NEW.{key};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE {counted} SET {column} = {column} - 1 WHERE id = OLD.{key};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {key} ON {table}
+        WHEN OLD.{key} IS NOT NEW.{key}
+        BEGIN
+            UPDATE {counted} SET {column} = {column} - 1 WHERE id = OLD.{key};
+            UPDATE {counted} SET {column} = {column} + 1 WHERE id = NEW.{key};
+        END
+        """,
+    ]
+
+
+COUNTER_TRIGGERS = [
+    *_counter_triggers(
+        "school_classroom_count", "classroom", "school", "classroom_count", "school_id"
+    ),
+    *_counter_triggers(
+        "school_user_count", "user_account", "school", "user_count", "school_id"
+    ),
+    *_counter_triggers(
+        "classroom_member_count",
+        "classroom_user_account_table",
+        "classroom",
+        "member_count",
+        "classroom_id",
+    ),
+    *_counter_triggers(
+        "user_account_assignment_count",
+        "assignment",
+        "user_account",
+        "assignment_count",
+        "student_id",
+    ),
+]
+
+for trigger in COUNTER_TRIGGERS:
+    event.listen(
+        Base.metadata, "after_create", DDL(trigger).execute_if(dialect="sqlite")
+    )
+
 # Configure mappers
 Base.registry.configure()
 configure_mappers()
@@ -1,6 +1,11 @@
-from typing import Any
+import secrets
+from typing import Any, Optional
 
+from fastapi import Header, HTTPException, Query, Request, Response
+
+from app import config
 from app.db import SessionLocal
+from app.schemas import IdFormat
 
 
 def get_database() -> Any:
@@ -10,3 +15,69 @@ def get_database() -> Any:
         yield database
     finally:
         database.close()
+
+
+def get_session_factory() -> Any:
+    """
+    The session factory itself, for routes that must not hold a session for
+    the whole response, such as event streams.
+    """
+    return SessionLocal
+
+
+def get_id_format(
+    response: Response,
+    id_format: Optional[IdFormat] = Query(None),
+    accept: Optional[str] = Header(None),
+) -> IdFormat:
+    """
+    Negotiate how id lists are encoded. The `id_format` query parameter wins,
+    otherwise an `ids` media type parameter is read from the Accept header,
+    e.g. `Accept: application/json; ids=ranges`. Responses vary on Accept,
+    so shared caches keep the encodings apart.
+    """
+    response.headers["Vary"] = "Accept"
+    if id_format:
+        return id_format
+    for media_range in (accept or "").split(","):
+        for param in media_range.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "ids":
+                try:
+                    return IdFormat(value.strip().strip('"').lower())
+                except ValueError:
+                    raise HTTPException(
+                        status_code=406, detail=f"Unsupported id format {value}."
+                    )
+    return IdFormat.list
+
+
+class CacheControl:
+    """
+    Router dependency setting the Cache-Control header. Reads get `policy`,
+    any other method gets `no-store`.
+    """
+
+    def __init__(self, policy: str):
+        self.policy = policy
+
+    def __call__(self, request: Request, response: Response) -> None:
+        if request.method in ("GET", "HEAD"):
+            response.headers["Cache-Control"] = self.policy
+        else:
+            response.headers["Cache-Control"] = "no-store"
+
+
+def require_debug_token(
+    x_debug_token: Optional[str] = Header(None),
+) -> None:
+    """
+    Guard for debug endpoints: they only exist when `DEBUG_TOKEN` is set and
+    the request carries it.
+    """
+    if not config.DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(
+        (x_debug_token or "").encode(), config.DEBUG_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from app import config
+from app.schemas import AssignmentChangeModel
+
+
+class Subscription:
+    """
+    A subscriber's queue of changes for one classroom. If the subscriber falls
+    `SSE_QUEUE_SIZE` changes behind it is marked overflowed and should
+    reconnect, catching up from the change log.
+    """
+
+    def __init__(self, classroom_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.classroom_id = classroom_id
+        self.loop = loop
+        self.queue: asyncio.Queue[Optional[AssignmentChangeModel]] = asyncio.Queue(
+            maxsize=config.SSE_QUEUE_SIZE
+        )
+        self.overflowed = False
+
+    def put(self, change: Optional[AssignmentChangeModel]) -> None:
+        # Runs on the subscriber's loop.
+        if self.overflowed:
+            return None
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class ChangeBroker:
+    """
+    In-process pub/sub of assignment changes, keyed by classroom. Changes are
+    published from service worker threads and delivered on each subscriber's
+    event loop.
+    """
+
+    def __init__(self) -> None:
+        self.subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, classroom_id: int) -> Subscription:
+        subscription = Subscription(classroom_id, asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions[classroom_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscriptions = self.subscriptions[subscription.classroom_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.classroom_id]
+
+    def publish(self, changes: List[AssignmentChangeModel]) -> None:
+        for change in changes:
+            with self.lock:
+                subscriptions = list(self.subscriptions.get(change.classroom_id, ()))
+            for subscription in subscriptions:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.put, change)
+                except RuntimeError:
+                    # The subscriber's loop is closed.
+                    self.unsubscribe(subscription)
+
+
+broker = ChangeBroker()
+
+
+def format_event(change: AssignmentChangeModel) -> str:
+    data = change.model_dump_json(include={"assignment_id", "classroom_id", "data"})
+    return f"id: {change.seq}\nevent: {change.action}\ndata: {data}\n\n"
@@ -2,3 +2,25 @@ class ServiceException(Exception):
     def __init__(self, msg, *args):
         super().__init__(*args)
         self.msg = msg
+
+
+class BackupError(Exception):
+    pass
+
+
+class BodyStoreError(Exception):
+    pass
+
+
+class MissingBodyError(Exception):
+    """
+    An assignment's `body_hash` points at no stored body.
+    """
+
+    def __init__(self, assignment_id, body_hash):
+        super().__init__(
+            f"Body {body_hash} of assignment {assignment_id} is missing from the"
+            " body store"
+        )
+        self.assignment_id = assignment_id
+        self.body_hash = body_hash
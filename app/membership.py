@@ -0,0 +1,132 @@
+"""
+In-process index of classroom membership.
+
+Each classroom maps to two sorted arrays of user ids, its students and its
+teachers, so membership and role checks are a binary search and cost no
+query. At 8 bytes per membership the index for a million memberships is a
+few megabytes.
+
+The index is loaded from `classroom_user_account_table` on first use and
+kept current by the services that write memberships, after they commit.
+Writes made by other processes (another worker, the CLI, a restore) are not
+seen until `load` runs again. `AssignmentService.is_enrolled` therefore
+confirms a miss against the database and adds what it finds; a membership
+removed by another process is still accepted until the next load.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left, insort
+from itertools import groupby
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import UserAccount, classroom_user_account_table
+
+
+def _contains(ids: array, id: int) -> bool:
+    index = bisect_left(ids, id)
+    return index < len(ids) and ids[index] == id
+
+
+def _discard(ids: array, id: int) -> None:
+    index = bisect_left(ids, id)
+    if index < len(ids) and ids[index] == id:
+        del ids[index]
+
+
+class MembershipIndex:
+    def __init__(self) -> None:
+        # classroom id -> (student ids, teacher ids), both sorted
+        self.classrooms: Dict[int, Tuple[array, array]] = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def load(self, database: Session) -> None:
+        member = classroom_user_account_table.c
+        rows = database.execute(
+            select(member.classroom_id, member.user_account_id, UserAccount.is_student)
+            .join(UserAccount, UserAccount.id == member.user_account_id)
+            .order_by(member.classroom_id, member.user_account_id)
+        )
+        classrooms = {}
+        for classroom_id, members in groupby(rows, key=lambda row: row[0]):
+            students, teachers = array("q"), array("q")
+            for _, user_id, is_student in members:
+                (students if is_student else teachers).append(user_id)
+            classrooms[classroom_id] = (students, teachers)
+        with self.lock:
+            self.classrooms = classrooms
+            self.loaded = True
+
+    def ensure_loaded(self, database: Session) -> None:
+        if not self.loaded:
+            self.load(database)
+
+    def is_member(self, classroom_id: int, user_id: int) -> bool:
+        return self.is_student(classroom_id, user_id) or self.is_teacher(
+            classroom_id, user_id
+        )
+
+    def is_student(self, classroom_id: int, user_id: int) -> bool:
+        if members := self.classrooms.get(classroom_id):
+            return _contains(members[0], user_id)
+        return False
+
+    def is_teacher(self, classroom_id: int, user_id: int) -> bool:
+        if members := self.classrooms.get(classroom_id):
+            return _contains(members[1], user_id)
+        return False
+
+    # Updates are applied after the write commits. They are idempotent and
+    # skipped until the index is loaded, since loading reads committed state.
+
+    def add(self, classroom_id: int, user_id: int, is_student: bool) -> None:
+        with self.lock:
+            if not self.loaded:
+                return
+            students, teachers = self.classrooms.setdefault(
+                classroom_id, (array("q"), array("q"))
+            )
+            _discard(teachers if is_student else students, user_id)
+            ids = students if is_student else teachers
+            if not _contains(ids, user_id):
+                insort(ids, user_id)
+
+    def discard(self, classroom_id: int, user_id: int) -> None:
+        with self.lock:
+            if members := self.classrooms.get(classroom_id):
+                _discard(members[0], user_id)
+                _discard(members[1], user_id)
+
+    def set_members(
+        self, classroom_id: int, members: Iterable[Tuple[int, bool]]
+    ) -> None:
+        """
+        Replace a classroom's members with `(user id, is_student)` pairs.
+        """
+        students, teachers = array("q"), array("q")
+        for user_id, is_student in sorted(members):
+            (students if is_student else teachers).append(user_id)
+        with self.lock:
+            if self.loaded:
+                self.classrooms[classroom_id] = (students, teachers)
+
+    def drop_classroom(self, classroom_id: int) -> None:
+        with self.lock:
+            self.classrooms.pop(classroom_id, None)
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the id arrays.
+        """
+        return sum(
+            ids.buffer_info()[1] * ids.itemsize
+            for members in self.classrooms.values()
+            for ids in members
+        )
+
+
+membership_index = MembershipIndex()
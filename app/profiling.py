@@ -0,0 +1,151 @@
+"""
+On-demand request profiling.
+
+`ProfilingMiddleware` profiles a request when it carries `X-Profile` set to
+the debug token, or for a `PROFILE_SAMPLE_RATE` fraction of requests. A
+sampling thread records the stacks of the event loop thread and of any
+database worker running the request's service calls (see
+`app.admission.run_db`), so time spent on both sides of `run_db` shows up.
+The loop thread is shared, so its samples can include other requests.
+
+Profiles are kept in memory as collapsed stacks, the input format of
+flamegraph.pl and speedscope, and served under `/debug/profiles`.
+"""
+
+import asyncio
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from itertools import count
+from typing import Any, Callable, Deque, Dict, Optional, Set, TypeVar
+
+from app import config
+
+T = TypeVar("T")
+
+current_profile: ContextVar[Optional["Profile"]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def collapse(frame, thread: str) -> str:
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}.{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    names.append(thread)
+    return ";".join(reversed(names))
+
+
+class Profile:
+    ids = count(1)
+
+    def __init__(self, route: str) -> None:
+        self.id = next(self.ids)
+        self.route = route
+        self.started = datetime.utcnow()
+        self.duration_ms = 0.0
+        self.samples: Counter[str] = Counter()
+        self.threads: Set[int] = set()
+
+    def wrap(self, func: Callable[[], T]) -> Callable[[], T]:
+        """
+        Wrap a call made on a worker thread so the thread is sampled too.
+        """
+
+        def call() -> T:
+            ident = threading.get_ident()
+            self.threads.add(ident)
+            try:
+                return func()
+            finally:
+                self.threads.discard(ident)
+
+        return call
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "started": self.started,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": sum(self.samples.values()),
+        }
+
+
+class Sampler(threading.Thread):
+    def __init__(self, profile: Profile, loop_thread: int, interval: float) -> None:
+        super().__init__(name=f"profile-{profile.id}", daemon=True)
+        self.profile = profile
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if frame := frames.get(self.loop_thread):
+                self.profile.samples[collapse(frame, "loop")] += 1
+            for ident in list(self.profile.threads):
+                if frame := frames.get(ident):
+                    self.profile.samples[collapse(frame, "db")] += 1
+
+
+profiles: Deque[Profile] = deque(maxlen=config.PROFILE_KEEP)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware; costs a header lookup and a random draw per request when
+    the request is not profiled.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    def wanted(self, scope) -> bool:
+        if config.DEBUG_TOKEN:
+            token = config.DEBUG_TOKEN.encode()
+            for name, value in scope["headers"]:
+                if name == b"x-profile" and secrets.compare_digest(value, token):
+                    return True
+        return random.random() < config.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self.wanted(scope):
+            return await self.app(scope, receive, send)
+
+        profile = Profile(f"{scope['method']} {scope['path']}")
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", str(profile.id).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = Sampler(
+            profile, threading.get_ident(), config.PROFILE_INTERVAL_MS / 1000
+        )
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            current_profile.reset(token)
+            sampler.stopped.set()
+            # Wait for the last sample, so readers never see it being written;
+            # off the loop, since that can take up to an interval.
+            await asyncio.to_thread(sampler.join)
+            profiles.append(profile)
@@ -1,19 +1,40 @@
 import asyncio
-from typing import Annotated, List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Query
-
-from app.exceptions import ServiceException
+from typing import Annotated, Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import sessionmaker
+
+from app import config
+from app.admission import item_admission, list_admission, run_db, write_admission
+from app.batching import assignment_batcher
+from app.dependencies import (
+    CacheControl,
+    get_id_format,
+    get_session_factory,
+    require_debug_token,
+)
+from app.events import broker, format_event
+from app.profiling import profiles
+from app.slowlog import slow_query_log
+from app.backup import backup
+from app.exceptions import BackupError, ServiceException
 from app.schemas import (
+    ClassroomCompactModel,
     ClassroomModel,
     ClassroomPostModel,
     ClassroomUpdateModel,
+    IdFormat,
+    SchoolCompactModel,
     SchoolModel,
     SchoolPostModel,
+    SchoolTreeModel,
     SchoolUpdateModel,
     UserAccountModel,
     UserAccountPostModel,
     UserAccountUpdateModel,
+    UserField,
+    AssignmentChangeModel,
     AssignmentPostModel,
     AssignmentUpdateModel,
     AssignmentModel,
@@ -31,23 +52,38 @@ from app.db import Assignment, Classroom, UserAccount, SessionLocal
 # Routers
 
 school_router = APIRouter(
-    prefix="/school", tags=["school"], responses={404: {"description": "Not Found"}}
+    prefix="/school",
+    tags=["school"],
+    responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(CacheControl(config.CACHE_CONTROL_SCHOOL))],
 )
 
 classroom_router = APIRouter(
     prefix="/classroom",
     tags=["classroom"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(CacheControl(config.CACHE_CONTROL_CLASSROOM))],
 )
 
 user_router = APIRouter(
-    prefix="/user", tags=["user"], responses={404: {"description": "Not Found"}}
+    prefix="/user",
+    tags=["user"],
+    responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(CacheControl(config.CACHE_CONTROL_USER))],
 )
 
 assignment_router = APIRouter(
     prefix="/assignment",
     tags=["assignment"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(CacheControl(config.CACHE_CONTROL_ASSIGNMENT))],
+)
+
+debug_router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_debug_token), Depends(CacheControl("no-store"))],
+    include_in_schema=False,
 )
 
 
@@ -55,30 +91,65 @@ assignment_router = APIRouter(
 
 @school_router.get("/")
 async def list_schools(
-    ids: Annotated[Optional[int], Query(alias="schools")] = None,
+    ids: Annotated[Optional[List[int]], Query(alias="schools")] = None,
+    id_format: IdFormat = Depends(get_id_format),
     service: SchoolService = Depends(ServiceDependency("SchoolService")),
-) -> List[SchoolModel]:
-    return await asyncio.to_thread(service.get_list, ids)
+) -> Union[List[SchoolCompactModel], List[SchoolModel]]:
+    if id_format != IdFormat.list:
+        return await list_admission.run(service.get_compact, id_format, ids)
+    return await list_admission.run(service.get_list, ids)
 
 
 @school_router.get("/{id}")
 async def get_school(
-    id: int, service: SchoolService = Depends(ServiceDependency("SchoolService"))
-) -> SchoolModel:
-    result = await asyncio.to_thread(service.get, id)
+    id: int,
+    id_format: IdFormat = Depends(get_id_format),
+    service: SchoolService = Depends(ServiceDependency("SchoolService")),
+) -> Union[SchoolCompactModel, SchoolModel]:
+    if id_format != IdFormat.list:
+        result = await item_admission.run(service.get_compact, id_format, [id])
+        if result:
+            return result[0]
+        raise HTTPException(status_code=404, detail="Not found.")
+    result = await item_admission.run(service.get, id)
     if result:
         return result
     else:
         raise HTTPException(status_code=404, detail="Not found.")
 
 
+@school_router.get(
+    "/{id}/tree",
+    response_model_exclude_none=True,
+    dependencies=[Depends(CacheControl(config.CACHE_CONTROL_SCHOOL_TREE))],
+)
+async def get_school_tree(
+    id: int,
+    depth: Annotated[int, Query(ge=0, le=2)] = 2,
+    fields: Annotated[Optional[List[UserField]], Query()] = None,
+    assignment_counts: bool = False,
+    service: SchoolService = Depends(ServiceDependency("SchoolService")),
+) -> SchoolTreeModel:
+    """
+    A school with its classrooms and their members in one response. `depth`
+    of 1 stops at classrooms, 0 at the school. `fields` selects the member
+    fields returned besides the id (all by default).
+    """
+    result = await list_admission.run(
+        service.get_tree, id, depth, fields or list(UserField), assignment_counts
+    )
+    if result:
+        return result
+    raise HTTPException(status_code=404, detail="Not found.")
+
+
 @school_router.post("/")
 async def create_school(
     data: SchoolPostModel,
     service: SchoolService = Depends(ServiceDependency("SchoolService")),
 ) -> SchoolModel:
     try:
-        result = await asyncio.to_thread(service.create, data)
+        result = await write_admission.run(service.create, data)
         return result
     except ServiceException:
         raise HTTPException(
@@ -93,7 +164,7 @@ async def update_school(
     service: SchoolService = Depends(ServiceDependency("SchoolService")),
 ) -> SchoolModel:
     try:
-        result = await asyncio.to_thread(service.update, id, data)
+        result = await write_admission.run(service.update, id, data)
         if result:
             return result
         else:
@@ -109,7 +180,7 @@ async def delete_school(
     id: int, service: SchoolService = Depends(ServiceDependency("SchoolService"))
 ) -> None:
     try:
-        await asyncio.to_thread(service.delete, id)
+        await write_admission.run(service.delete, id)
         return None
     except ServiceException:
         raise HTTPException(
@@ -121,17 +192,27 @@ async def delete_school(
 
 @classroom_router.get("/")
 async def list_classrooms(
-    ids: Annotated[Optional[int], Query(alias="classrooms")] = None,
+    ids: Annotated[Optional[List[int]], Query(alias="classrooms")] = None,
+    id_format: IdFormat = Depends(get_id_format),
     service: ClassroomService = Depends(ServiceDependency("ClassroomService")),
-) -> List[ClassroomModel]:
-    return await asyncio.to_thread(service.get_list, ids)
+) -> Union[List[ClassroomCompactModel], List[ClassroomModel]]:
+    if id_format != IdFormat.list:
+        return await list_admission.run(service.get_compact, id_format, ids)
+    return await list_admission.run(service.get_list, ids)
 
 
 @classroom_router.get("/{id}")
 async def get_classroom(
-    id: int, service: ClassroomService = Depends(ServiceDependency("ClassroomService"))
-) -> ClassroomModel:
-    result = await asyncio.to_thread(service.get, id)
+    id: int,
+    id_format: IdFormat = Depends(get_id_format),
+    service: ClassroomService = Depends(ServiceDependency("ClassroomService")),
+) -> Union[ClassroomCompactModel, ClassroomModel]:
+    if id_format != IdFormat.list:
+        result = await item_admission.run(service.get_compact, id_format, [id])
+        if result:
+            return result[0]
+        raise HTTPException(status_code=404, detail="Not found.")
+    result = await item_admission.run(service.get, id)
     if result:
         return result
     else:
@@ -144,7 +225,7 @@ async def create_classroom(
     service: ClassroomService = Depends(ServiceDependency("ClassroomService")),
 ) -> ClassroomModel:
     try:
-        result = await asyncio.to_thread(service.create, data)
+        result = await write_admission.run(service.create, data)
         return result
     except ServiceException:
         raise HTTPException(
@@ -159,7 +240,7 @@ async def update_classroom(
     service: ClassroomService = Depends(ServiceDependency("ClassroomService")),
 ) -> ClassroomModel:
     try:
-        result = await asyncio.to_thread(service.update, id, data)
+        result = await write_admission.run(service.update, id, data)
         if result:
             return result
         else:
@@ -175,7 +256,7 @@ async def delete_classroom(
     id: int, service: ClassroomService = Depends(ServiceDependency("ClassroomService"))
 ) -> None:
     try:
-        await asyncio.to_thread(service.delete, id)
+        await write_admission.run(service.delete, id)
         return None
     except ServiceException:
         raise HTTPException(
@@ -183,14 +264,99 @@ async def delete_classroom(
         )
 
 
+@classroom_router.get("/{id}/assignments/events")
+async def classroom_assignment_events(
+    id: int,
+    request: Request,
+    since: Optional[int] = None,
+    last_event_id: Annotated[Optional[int], Header()] = None,
+    session_factory: sessionmaker = Depends(get_session_factory),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of assignment changes in a classroom.
+
+    Each event's id is its sequence number in the change log. A client that
+    reconnects with `Last-Event-ID` (or `?since=`) first receives the changes
+    it missed, a page of `SSE_CATCH_UP_LIMIT` at a time, then live ones.
+
+    The classroom check and each catch-up page use a session that is closed
+    before the page is streamed; an open stream holds only its queue, not a
+    pooled connection.
+    """
+    since = last_event_id if last_event_id is not None else since
+
+    def catch_up() -> Optional[List[AssignmentChangeModel]]:
+        with session_factory() as database:
+            if not ClassroomService(database).get(id):
+                return None
+            if since is None:
+                return []
+            return AssignmentService(database).get_changes(
+                id, since, config.SSE_CATCH_UP_LIMIT
+            )
+
+    def next_page(after: int) -> List[AssignmentChangeModel]:
+        with session_factory() as database:
+            return AssignmentService(database).get_changes(
+                id, after, config.SSE_CATCH_UP_LIMIT
+            )
+
+    # Subscribe before reading the log so nothing falls between the two.
+    subscription = broker.subscribe(id)
+    try:
+        backlog = await item_admission.run(catch_up)
+    except BaseException:
+        broker.unsubscribe(subscription)
+        raise
+    if backlog is None:
+        broker.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail="Not found.")
+
+    async def stream():
+        last_seq = since or 0
+        page = backlog
+        try:
+            while page:
+                for change in page:
+                    last_seq = change.seq
+                    yield format_event(change)
+                if len(page) < config.SSE_CATCH_UP_LIMIT:
+                    break
+                # A full page: there may be more. Live changes wait in the
+                # queue meanwhile; if it overflows the client reconnects.
+                page = await item_admission.run(next_page, last_seq)
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.queue.get(), config.SSE_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if change is None:
+                    # Fell behind; the client reconnects and catches up.
+                    break
+                if change.seq > last_seq:
+                    last_seq = change.seq
+                    yield format_event(change)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
 # User Routes
 
 @user_router.get("/")
 async def list_users(
-    ids: Annotated[Optional[int], Query(alias="users")] = None,
+    ids: Annotated[Optional[List[int]], Query(alias="users")] = None,
     service: UserAccountService = Depends(ServiceDependency("UserAccountService")),
 ) -> List[UserAccountModel]:
-    return await asyncio.to_thread(service.get_list, ids)
+    return await list_admission.run(service.get_list, ids)
 
 
 @user_router.get("/{id}")
@@ -198,7 +364,7 @@ async def get_user(
     id: int,
     service: UserAccountService = Depends(ServiceDependency("UserAccountService")),
 ) -> UserAccountModel:
-    result = await asyncio.to_thread(service.get, id)
+    result = await item_admission.run(service.get, id)
     if result:
         return result
     else:
@@ -211,7 +377,7 @@ async def create_user(
     service: UserAccountService = Depends(ServiceDependency("UserAccountService")),
 ) -> UserAccountModel:
     try:
-        result = await asyncio.to_thread(service.create, data)
+        result = await write_admission.run(service.create, data)
         return result
     except ServiceException:
         raise HTTPException(
@@ -226,7 +392,7 @@ async def update_user(
     service: UserAccountService = Depends(ServiceDependency("UserAccountService")),
 ) -> UserAccountModel:
     try:
-        result = await asyncio.to_thread(service.update, id, data)
+        result = await write_admission.run(service.update, id, data)
         if result:
             return result
         else:
@@ -243,7 +409,7 @@ async def delete_user(
     service: UserAccountService = Depends(ServiceDependency("UserAccountService")),
 ) -> None:
     try:
-        await asyncio.to_thread(service.delete, id)
+        await write_admission.run(service.delete, id)
         return None
     except ServiceException:
         raise HTTPException(
@@ -257,16 +423,19 @@ async def delete_user(
 async def list_assignments(
     classroom_name: Optional[str] = None,
     student_name: Optional[str] = None,
+    include_archived: bool = False,
     service: AssignmentService = Depends(ServiceDependency("AssignmentService")),
 ):
-    return await asyncio.to_thread(service.get_list, classroom_name, student_name)
+    return await list_admission.run(
+        service.get_list, classroom_name, student_name, include_archived
+    )
 
 
 @assignment_router.get("/{id}", response_model=AssignmentModel)
 async def get_assignment(
     id: int, service: AssignmentService = Depends(ServiceDependency("AssignmentService"))
 ):
-    result = await asyncio.to_thread(service.get, id)
+    result = await item_admission.run(service.get, id)
     if not result:
         raise HTTPException(status_code=404, detail="Assignment not found")
     return result
@@ -277,10 +446,12 @@ async def create_assignment(
     data: AssignmentPostModel, service: AssignmentService = Depends(ServiceDependency("AssignmentService"))
 ):
     try:
-        result = await asyncio.to_thread(service.create, data)
+        if assignment_batcher.enabled:
+            return await assignment_batcher.create(data)
+        result = await write_admission.run(service.create, data)
         return result
     except ServiceException as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=e.msg)
 
 
 @assignment_router.patch("/{id}", response_model=AssignmentModel)
@@ -288,12 +459,12 @@ async def update_assignment(
     id: int, data: AssignmentUpdateModel, service: AssignmentService = Depends(ServiceDependency("AssignmentService"))
 ):
     try:
-        result = await asyncio.to_thread(service.update, id, data)
+        result = await write_admission.run(service.update, id, data)
         if not result:
             raise HTTPException(status_code=404, detail="Assignment not found")
         return result
     except ServiceException as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=e.msg)
 
 
 @assignment_router.delete("/{id}", status_code=204)
@@ -301,8 +472,44 @@ async def delete_assignment(
     id: int, service: AssignmentService = Depends(ServiceDependency("AssignmentService"))
 ):
     try:
-        await asyncio.to_thread(service.delete, id)
+        await write_admission.run(service.delete, id)
         return None
     except ServiceException as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=404, detail=e.msg)
+
+
+# Debug Routes
+
+@debug_router.get("/slow-queries")
+async def list_slow_queries() -> List[Dict[str, Any]]:
+    """
+    Slow statements, slowest in total first, with their last occurrence.
+    """
+    return slow_query_log.summary()
+
+
+@debug_router.post("/backup")
+async def create_backup() -> Dict[str, Any]:
+    """
+    Snapshot the database into BACKUP_DIR while it keeps serving.
+    """
+    try:
+        return await run_db(backup)
+    except BackupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@debug_router.get("/profiles")
+async def list_profiles() -> List[Dict[str, Any]]:
+    return [profile.describe() for profile in reversed(profiles)]
+
 
+@debug_router.get("/profiles/{id}", response_class=PlainTextResponse)
+async def get_profile(id: int) -> str:
+    """
+    A profile as collapsed stacks, for flamegraph.pl or speedscope.
+    """
+    for profile in profiles:
+        if profile.id == id:
+            return profile.collapsed()
+    raise HTTPException(status_code=404, detail="Not found.")
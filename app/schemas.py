@@ -1,8 +1,57 @@
-from typing import Any, List, Optional
+from enum import Enum
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, field_validator
 
 
+# Id Set Schemas
+
+class IdFormat(str, Enum):
+    list = "list"
+    ranges = "ranges"
+    delta = "delta"
+    count = "count"
+
+
+class IdSetModel(BaseModel):
+    """
+    Compact representation of a set of ids.
+
+    `ranges` holds inclusive `[start, end]` pairs. `delta` holds
+    `[gap, repeat]` pairs, where each gap is the difference from the previous
+    id (the first one from 0) and repeat is how many times it occurs in a row.
+    """
+
+    format: IdFormat
+    count: int
+    ids: Optional[List[int]] = None
+    ranges: Optional[List[List[int]]] = None
+    delta: Optional[List[List[int]]] = None
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], format: IdFormat) -> "IdSetModel":
+        """
+        Encode ids, which must be sorted ascending, in the requested format.
+        """
+        ids = list(ids)
+        if format == IdFormat.ranges:
+            ranges: List[List[int]] = []
+            for id in ids:
+                if ranges and ranges[-1][1] + 1 == id:
+                    ranges[-1][1] = id
+                else:
+                    ranges.append([id, id])
+            return cls(format=format, count=len(ids), ranges=ranges)
+        if format == IdFormat.delta:
+            gaps = (id - previous for previous, id in zip([0] + ids, ids))
+            delta = [[gap, len(list(run))] for gap, run in groupby(gaps)]
+            return cls(format=format, count=len(ids), delta=delta)
+        if format == IdFormat.count:
+            return cls(format=format, count=len(ids))
+        return cls(format=format, count=len(ids), ids=ids)
+
+
 # School Schemas
 
 class SchoolPostModel(BaseModel):
@@ -11,6 +60,8 @@ class SchoolPostModel(BaseModel):
 
 class SchoolModel(SchoolPostModel):
     id: int
+    classroom_count: Optional[int] = None
+    user_count: Optional[int] = None
     classrooms: Optional[List[int]] = None
     user_accounts: Optional[List[int]] = None
 
@@ -22,6 +73,38 @@ class SchoolModel(SchoolPostModel):
         return None
 
 
+class SchoolCompactModel(SchoolPostModel):
+    id: int
+    classrooms: IdSetModel
+    user_accounts: IdSetModel
+
+
+class UserField(str, Enum):
+    name = "name"
+    email = "email"
+    is_student = "is_student"
+
+
+class SchoolTreeUserModel(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    is_student: Optional[bool] = None
+    assignment_count: Optional[int] = None
+
+
+class SchoolTreeClassroomModel(BaseModel):
+    id: int
+    name: str
+    assignment_count: Optional[int] = None
+    members: Optional[List[SchoolTreeUserModel]] = None
+
+
+class SchoolTreeModel(SchoolPostModel):
+    id: int
+    classrooms: Optional[List[SchoolTreeClassroomModel]] = None
+
+
 class SchoolUpdateModel(BaseModel):
     name: Optional[str] = None
     classrooms: Optional[List[int]] = None
@@ -38,6 +121,7 @@ class ClassroomPostModel(BaseModel):
 
 class ClassroomModel(ClassroomPostModel):
     id: int
+    member_count: Optional[int] = None
     user_accounts: Optional[List[int]] = None
 
     @field_validator("user_accounts", mode="before")
@@ -48,6 +132,11 @@ class ClassroomModel(ClassroomPostModel):
         return None
 
 
+class ClassroomCompactModel(ClassroomPostModel):
+    id: int
+    user_accounts: IdSetModel
+
+
 class ClassroomUpdateModel(BaseModel):
     name: Optional[str] = None
     user_accounts: Optional[List[int]] = None
@@ -66,6 +155,7 @@ class UserAccountPostModel(BaseModel):
 
 class UserAccountModel(UserAccountPostModel):
     id: int
+    assignment_count: Optional[int] = None
 
     @field_validator("classrooms", mode="before")
     @classmethod
@@ -100,6 +190,8 @@ class AssignmentModel(AssignmentPostModel):
     @field_validator("classroom", "student", mode="before")
     @classmethod
     def get_id(cls, value: Any) -> Optional[int]:
+        if isinstance(value, int):
+            return value
         if value:
             return value.id
         return None
@@ -111,3 +203,11 @@ class AssignmentUpdateModel(BaseModel):
     submission_date: Optional[datetime] = None
     classroom_id: Optional[int] = None
     student_id: Optional[int] = None
+
+
+class AssignmentChangeModel(BaseModel):
+    seq: int
+    action: str
+    assignment_id: int
+    classroom_id: int
+    data: Optional[Dict[str, Any]] = None
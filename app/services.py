@@ -1,19 +1,47 @@
-from typing import Annotated, List, Optional, Sequence
+import sqlite3
+from datetime import datetime
+from itertools import groupby
+from typing import Annotated, Dict, List, Optional, Sequence, Union
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, func, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.db import Classroom, School, UserAccount, Assignment
+from app import config, statements
+from app.archive import archive_attached
+from app.db import (
+    AssignmentBody,
+    AssignmentChange,
+    Classroom,
+    School,
+    UserAccount,
+    Assignment,
+    body_values,
+    classroom_user_account_table,
+    missing_body,
+    store_bodies,
+)
 from app.dependencies import get_database
+from app.events import broker
 from app.exceptions import ServiceException
+from app.membership import membership_index
 from app.schemas import (
+    AssignmentChangeModel,
+    ClassroomCompactModel,
     ClassroomPostModel,
     ClassroomUpdateModel,
+    IdFormat,
+    IdSetModel,
+    SchoolCompactModel,
     SchoolPostModel,
+    SchoolTreeClassroomModel,
+    SchoolTreeModel,
+    SchoolTreeUserModel,
     SchoolUpdateModel,
+    UserField,
     UserAccountPostModel,
     UserAccountUpdateModel,
+    AssignmentModel,
     AssignmentPostModel,
     AssignmentUpdateModel,
 )
@@ -23,20 +51,188 @@ class BaseService:
     def __init__(self, database: Session) -> None:
         self.database = database
 
+    def reload(self, stmt, id: int):
+        """
+        Load a committed row again with its statement's eager loads, so the
+        response is serialized without lazy loads.
+        """
+        return self.database.scalar(
+            stmt, {"id": id}, execution_options={"populate_existing": True}
+        )
+
+    def insert_values(self, model, key, rows: List[Dict]) -> List[int]:
+        """
+        Insert `rows` with multi-row `INSERT ... VALUES ... RETURNING`
+        statements, as few as SQLite's bound variable limit allows, and return
+        their new `key` values in the order of `rows`. RETURNING promises no
+        order, but new rowids ascend in VALUES order, so the sorted keys line
+        up with the rows.
+        """
+        dbapi_connection = self.database.connection().connection.dbapi_connection
+        limit = dbapi_connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        # Columns with client-side defaults are bound too.
+        size = max(1, limit // len(model.__table__.columns))
+        keys = []
+        for start in range(0, len(rows), size):
+            stmt = insert(model).values(rows[start : start + size]).returning(key)
+            keys.extend(sorted(self.database.scalars(stmt)))
+        return keys
+
+    def get_id_sets(
+        self,
+        owner_column: ColumnElement[int],
+        id_column: ColumnElement[int],
+        owner_ids: Sequence[int],
+        format: IdFormat,
+    ) -> Dict[int, IdSetModel]:
+        """
+        Build an id set per owner straight from the id columns, without loading
+        ORM objects. Not used for `count`: callers read the counter columns.
+        """
+        stmt = (
+            select(owner_column, id_column)
+            .where(owner_column.in_(owner_ids))
+            .order_by(owner_column, id_column)
+        )
+        rows = self.database.execute(stmt).tuples()
+        ids = {
+            owner_id: [id for _, id in group]
+            for owner_id, group in groupby(rows, key=lambda row: row[0])
+        }
+        return {
+            owner_id: IdSetModel.from_ids(ids.get(owner_id, []), format)
+            for owner_id in owner_ids
+        }
 
 
 # School Service
 
 class SchoolService(BaseService):
     def get(self, id: int) -> Optional[School]:
-        stmt = select(School).where(School.id == id)
-        return self.database.scalar(stmt)
+        return self.database.scalar(statements.school_by_id, {"id": id})
 
     def get_list(self, ids: Optional[List[int]] = None) -> Sequence[School]:
-        stmt = select(School)
+        if ids:
+            return self.database.scalars(
+                statements.school_list_by_ids, {"ids": ids}
+            ).all()
+        return self.database.scalars(statements.school_list).all()
+
+    def get_compact(
+        self, format: IdFormat, ids: Optional[List[int]] = None
+    ) -> List[SchoolCompactModel]:
+        stmt = select(
+            School.id, School.name, School.classroom_count, School.user_count
+        ).order_by(School.id)
         if ids:
             stmt = stmt.where(School.id.in_(ids))
-        return self.database.scalars(stmt).all()
+        schools = self.database.execute(stmt).all()
+        school_ids = [school.id for school in schools]
+        if format == IdFormat.count:
+            # Counts are maintained on write, no need to aggregate.
+            classrooms = {
+                school.id: IdSetModel(format=format, count=school.classroom_count)
+                for school in schools
+            }
+            user_accounts = {
+                school.id: IdSetModel(format=format, count=school.user_count)
+                for school in schools
+            }
+        else:
+            classrooms = self.get_id_sets(
+                Classroom.school_id, Classroom.id, school_ids, format
+            )
+            user_accounts = self.get_id_sets(
+                UserAccount.school_id, UserAccount.id, school_ids, format
+            )
+        return [
+            SchoolCompactModel(
+                id=school.id,
+                name=school.name,
+                classrooms=classrooms[school.id],
+                user_accounts=user_accounts[school.id],
+            )
+            for school in schools
+        ]
+
+    def get_tree(
+        self,
+        id: int,
+        depth: int = 2,
+        user_fields: Sequence[UserField] = (),
+        assignment_counts: bool = False,
+    ) -> Optional[SchoolTreeModel]:
+        """
+        Assemble a school with its classrooms (depth 1) and their members
+        (depth 2). Uses at most four queries whatever the school size: the
+        school, its classrooms, all memberships joined to users, and the
+        assignment counts grouped by classroom and student.
+        """
+        school = self.database.execute(
+            select(School.id, School.name).where(School.id == id)
+        ).first()
+        if school is None:
+            return None
+        tree = SchoolTreeModel(id=school.id, name=school.name)
+        if depth < 1:
+            return tree
+
+        classroom_ids = select(Classroom.id).where(Classroom.school_id == id)
+        classrooms = {
+            classroom.id: SchoolTreeClassroomModel(
+                id=classroom.id, name=classroom.name
+            )
+            for classroom in self.database.execute(
+                select(Classroom.id, Classroom.name)
+                .where(Classroom.school_id == id)
+                .order_by(Classroom.id)
+            )
+        }
+        tree.classrooms = list(classrooms.values())
+
+        counts: Dict[int, Dict[int, int]] = {}
+        if assignment_counts:
+            for classroom_id, student_id, count in self.database.execute(
+                select(
+                    Assignment.classroom_id, Assignment.student_id, func.count()
+                )
+                .where(Assignment.classroom_id.in_(classroom_ids))
+                .group_by(Assignment.classroom_id, Assignment.student_id)
+            ):
+                counts.setdefault(classroom_id, {})[student_id] = count
+            for classroom in tree.classrooms:
+                classroom.assignment_count = sum(
+                    counts.get(classroom.id, {}).values()
+                )
+        if depth < 2:
+            return tree
+
+        columns = [getattr(UserAccount, field.value) for field in user_fields]
+        members = self.database.execute(
+            select(
+                classroom_user_account_table.c.classroom_id,
+                UserAccount.id,
+                *columns,
+            )
+            .join(
+                UserAccount,
+                UserAccount.id == classroom_user_account_table.c.user_account_id,
+            )
+            .where(classroom_user_account_table.c.classroom_id.in_(classroom_ids))
+            .order_by(classroom_user_account_table.c.classroom_id, UserAccount.id)
+        )
+        for classroom in tree.classrooms:
+            classroom.members = []
+        for member in members:
+            classroom = classrooms[member.classroom_id]
+            user = SchoolTreeUserModel(
+                id=member.id,
+                **{field.value: getattr(member, field.value) for field in user_fields},
+            )
+            if assignment_counts:
+                user.assignment_count = counts.get(classroom.id, {}).get(user.id, 0)
+            classroom.members.append(user)
+        return tree
 
     def create(self, data: SchoolPostModel) -> School:
         school = School(name=data.name)
@@ -46,21 +242,20 @@ class SchoolService(BaseService):
         except IntegrityError:
             self.database.rollback()
             raise ServiceException(f"Could not Create {data.name}")
-        self.database.refresh(school)
-        return school
+        return self.reload(statements.school_by_id, school.id)
 
     def update(self, id: int, data: SchoolUpdateModel) -> Optional[School]:
-        if school := self.database.scalar(select(School).where(School.id == id)):
+        if school := self.database.scalar(statements.school_by_id, {"id": id}):
             if data.name:
                 school.name = data.name
             if data.classrooms:
                 classrooms = self.database.scalars(
-                    select(Classroom).where(Classroom.id.in_(data.classrooms))
+                    statements.classroom_list_by_ids, {"ids": data.classrooms}
                 ).all()
                 school.classrooms = classrooms
             if data.user_accounts:
                 user_accounts = self.database.scalars(
-                    select(UserAccount).where(UserAccount.id.in_(data.user_accounts))
+                    statements.user_account_list_by_ids, {"ids": data.user_accounts}
                 ).all()
                 school.user_accounts = user_accounts
             try:
@@ -68,11 +263,11 @@ class SchoolService(BaseService):
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException(f"Could not Update {school.name}")
-            return school
+            return self.reload(statements.school_by_id, id)
         return None
 
     def delete(self, id: int) -> None:
-        if school := self.database.scalar(select(School).where(School.id == id)):
+        if school := self.database.scalar(statements.school_by_id, {"id": id}):
             try:
                 self.database.delete(school)
                 self.database.commit()
@@ -87,14 +282,45 @@ class SchoolService(BaseService):
 
 class ClassroomService(BaseService):
     def get(self, id: int) -> Optional[Classroom]:
-        stmt = select(Classroom).where(Classroom.id == id)
-        return self.database.scalar(stmt)
+        return self.database.scalar(statements.classroom_by_id, {"id": id})
 
     def get_list(self, ids: Optional[List[int]] = None) -> Sequence[Classroom]:
-        stmt = select(Classroom)
+        if ids:
+            return self.database.scalars(
+                statements.classroom_list_by_ids, {"ids": ids}
+            ).all()
+        return self.database.scalars(statements.classroom_list).all()
+
+    def get_compact(
+        self, format: IdFormat, ids: Optional[List[int]] = None
+    ) -> List[ClassroomCompactModel]:
+        stmt = select(
+            Classroom.id, Classroom.name, Classroom.school_id, Classroom.member_count
+        ).order_by(Classroom.id)
         if ids:
             stmt = stmt.where(Classroom.id.in_(ids))
-        return self.database.scalars(stmt).all()
+        classrooms = self.database.execute(stmt).all()
+        if format == IdFormat.count:
+            user_accounts = {
+                classroom.id: IdSetModel(format=format, count=classroom.member_count)
+                for classroom in classrooms
+            }
+        else:
+            user_accounts = self.get_id_sets(
+                classroom_user_account_table.c.classroom_id,
+                classroom_user_account_table.c.user_account_id,
+                [classroom.id for classroom in classrooms],
+                format,
+            )
+        return [
+            ClassroomCompactModel(
+                id=classroom.id,
+                name=classroom.name,
+                school_id=classroom.school_id,
+                user_accounts=user_accounts[classroom.id],
+            )
+            for classroom in classrooms
+        ]
 
     def create(self, data: ClassroomPostModel) -> Classroom:
         classroom = Classroom(name=data.name, school_id=data.school_id)
@@ -104,16 +330,15 @@ class ClassroomService(BaseService):
         except IntegrityError:
             self.database.rollback()
             raise ServiceException(f"Could not Create {data.name}")
-        self.database.refresh(classroom)
-        return classroom
+        return self.reload(statements.classroom_by_id, classroom.id)
 
     def update(self, id: int, data: ClassroomUpdateModel) -> Optional[Classroom]:
-        if classroom := self.database.scalar(select(Classroom).where(Classroom.id == id)):
+        if classroom := self.database.scalar(statements.classroom_by_id, {"id": id}):
             if data.name:
                 classroom.name = data.name
             if data.user_accounts:
                 user_accounts = self.database.scalars(
-                    select(UserAccount).where(UserAccount.id.in_(data.user_accounts))
+                    statements.user_account_list_by_ids, {"ids": data.user_accounts}
                 ).all()
                 classroom.user_accounts = user_accounts
             try:
@@ -121,17 +346,23 @@ class ClassroomService(BaseService):
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException(f"Could not Update {classroom.name}")
-            return classroom
+            if data.user_accounts:
+                membership_index.set_members(
+                    classroom.id,
+                    [(user.id, user.is_student) for user in classroom.user_accounts],
+                )
+            return self.reload(statements.classroom_by_id, id)
         return None
 
     def delete(self, id: int) -> None:
-        if classroom := self.database.scalar(select(Classroom).where(Classroom.id == id)):
+        if classroom := self.database.scalar(statements.classroom_by_id, {"id": id}):
             try:
                 self.database.delete(classroom)
                 self.database.commit()
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException(f"Failed to delete {classroom.name}")
+            membership_index.drop_classroom(id)
         return None
 
 
@@ -140,18 +371,18 @@ class ClassroomService(BaseService):
 
 class UserAccountService(BaseService):
     def get(self, id: int) -> Optional[UserAccount]:
-        stmt = select(UserAccount).where(UserAccount.id == id)
-        return self.database.scalar(stmt)
+        return self.database.scalar(statements.user_account_by_id, {"id": id})
 
     def get_list(self, ids: Optional[List[int]] = None) -> Sequence[UserAccount]:
-        stmt = select(UserAccount)
         if ids:
-            stmt = stmt.where(UserAccount.id.in_(ids))
-        return self.database.scalars(stmt).all()
+            return self.database.scalars(
+                statements.user_account_list_by_ids, {"ids": ids}
+            ).all()
+        return self.database.scalars(statements.user_account_list).all()
 
     def create(self, data: UserAccountPostModel) -> UserAccount:
         classrooms = self.database.scalars(
-            select(Classroom).where(Classroom.id.in_(data.classrooms))
+            statements.classroom_list_by_ids, {"ids": data.classrooms or []}
         ).all()
         user_account = UserAccount(
             name=data.name,
@@ -166,11 +397,16 @@ class UserAccountService(BaseService):
         except IntegrityError:
             self.database.rollback()
             raise ServiceException(f"Could not create {data.name}")
-        self.database.refresh(user_account)
-        return user_account
+        for classroom in classrooms:
+            membership_index.add(
+                classroom.id, user_account.id, user_account.is_student
+            )
+        return self.reload(statements.user_account_by_id, user_account.id)
 
     def update(self, id: int, data: UserAccountUpdateModel) -> Optional[UserAccount]:
-        if user_account := self.database.scalar(select(UserAccount).where(UserAccount.id == id)):
+        if user_account := self.database.scalar(
+            statements.user_account_by_id, {"id": id}
+        ):
             if data.name:
                 user_account.name = data.name
             if data.email:
@@ -182,17 +418,27 @@ class UserAccountService(BaseService):
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException(f"Could not Update {user_account.name}")
-            return user_account
+            if data.is_student is not None:
+                for classroom in user_account.classrooms:
+                    membership_index.add(
+                        classroom.id, user_account.id, user_account.is_student
+                    )
+            return self.reload(statements.user_account_by_id, id)
         return None
 
     def delete(self, id: int) -> None:
-        if user_account := self.database.scalar(select(UserAccount).where(UserAccount.id == id)):
+        if user_account := self.database.scalar(
+            statements.user_account_by_id, {"id": id}
+        ):
+            classroom_ids = [classroom.id for classroom in user_account.classrooms]
             try:
                 self.database.delete(user_account)
                 self.database.commit()
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException(f"Failed to delete {user_account.name}")
+            for classroom_id in classroom_ids:
+                membership_index.discard(classroom_id, id)
         return None
 
 
@@ -200,21 +446,129 @@ class UserAccountService(BaseService):
 # Assignment Service
 
 class AssignmentService(BaseService):
+    def check_bodies(self, assignments: Sequence[Assignment]) -> None:
+        """
+        Raise `MissingBodyError` for a body missing from the store. Checked
+        here: raised while serializing, it would only show as a validation
+        error.
+        """
+        for assignment in assignments:
+            if assignment.body_hash is not None and assignment.stored_body is None:
+                raise missing_body(assignment.id, assignment.body_hash)
+
+    def reload(self, stmt, id: int):
+        assignment = super().reload(stmt, id)
+        if assignment:
+            self.check_bodies([assignment])
+        return assignment
+
     def get(self, id: int) -> Optional[Assignment]:
-        stmt = select(Assignment).where(Assignment.id == id)
-        return self.database.scalar(stmt)
+        assignment = self.database.scalar(statements.assignment_by_id, {"id": id})
+        if assignment:
+            self.check_bodies([assignment])
+        return assignment
 
     def get_list(
-        self, classroom_name: Optional[str] = None, student_name: Optional[str] = None
-    ) -> Sequence[Assignment]:
-        stmt = select(Assignment)
-        if classroom_name:
-            stmt = stmt.join(Assignment.classroom).where(Classroom.name == classroom_name)
-        if student_name:
-            stmt = stmt.join(Assignment.student).where(UserAccount.name == student_name)
-        return self.database.scalars(stmt).all()
+        self,
+        classroom_name: Optional[str] = None,
+        student_name: Optional[str] = None,
+        include_archived: bool = False,
+    ) -> Sequence[Union[Assignment, AssignmentModel]]:
+        key = (bool(classroom_name), bool(student_name))
+        params = {"classroom_name": classroom_name, "student_name": student_name}
+        assignments = self.database.scalars(
+            statements.assignment_list[key], params
+        ).all()
+        self.check_bodies(assignments)
+        if not include_archived or not archive_attached(self.database.connection()):
+            return assignments
+        archived = [
+            AssignmentModel(
+                id=row.id,
+                title=row.title,
+                body=self.archived_body(row),
+                submission_date=row.submission_date,
+                classroom_id=row.classroom_id,
+                student_id=row.student_id,
+                classroom=row.classroom_id,
+                student=row.student_id,
+            )
+            for row in self.database.execute(
+                statements.archived_assignment_list[key], params
+            )
+        ]
+        return archived + list(assignments)
+
+    def archived_body(self, row) -> str:
+        if row.stored_body is not None:
+            return AssignmentBody.decode(row.stored_body)
+        if row.body_hash is not None:
+            raise missing_body(row.id, row.body_hash)
+        return row.body
+
+    def get_changes(
+        self, classroom_id: int, since: int, limit: int
+    ) -> List[AssignmentChangeModel]:
+        changes = self.database.scalars(
+            statements.assignment_changes_since,
+            {"classroom_id": classroom_id, "since": since, "limit": limit},
+        ).all()
+        return [
+            AssignmentChangeModel.model_validate(change, from_attributes=True)
+            for change in changes
+        ]
+
+    def record_change(
+        self, action: str, assignment: Assignment, classroom_id: Optional[int] = None
+    ) -> AssignmentChangeModel:
+        """
+        Add a change log entry in the current transaction. Flushes, so the
+        assignment and the entry have their ids.
+        """
+        self.database.flush()
+        data = None
+        if action != "delete":
+            data = {
+                "id": assignment.id,
+                "title": assignment.title,
+                "submission_date": assignment.submission_date.isoformat(),
+                "classroom_id": assignment.classroom_id,
+                "student_id": assignment.student_id,
+            }
+        change = AssignmentChange(
+            action=action,
+            assignment_id=assignment.id,
+            classroom_id=classroom_id or assignment.classroom_id,
+            data=data,
+        )
+        self.database.add(change)
+        self.database.flush()
+        return AssignmentChangeModel.model_validate(change, from_attributes=True)
+
+    def is_enrolled(self, classroom_id: int, student_id: int) -> bool:
+        """
+        Whether the student is a student member of the classroom. Answered by
+        the in-process membership index; a miss is confirmed against the
+        database, since the membership may have been written by another
+        process.
+        """
+        if not config.MEMBERSHIP_CHECK:
+            return True
+        membership_index.ensure_loaded(self.database)
+        if membership_index.is_student(classroom_id, student_id):
+            return True
+        is_student = self.database.scalar(
+            statements.membership,
+            {"classroom_id": classroom_id, "user_account_id": student_id},
+        )
+        if is_student is None:
+            return False
+        membership_index.add(classroom_id, student_id, is_student)
+        return is_student
 
     def create(self, data: AssignmentPostModel) -> Assignment:
+        if not self.is_enrolled(data.classroom_id, data.student_id):
+            raise ServiceException("Student is not enrolled in the classroom")
         assignment = Assignment(
             title=data.title,
             body=data.body,
@@ -224,15 +578,113 @@ class AssignmentService(BaseService):
         )
         try:
             self.database.add(assignment)
+            changes = [self.record_change("create", assignment)]
             self.database.commit()
         except IntegrityError:
             self.database.rollback()
             raise ServiceException("Could not create assignment")
-        self.database.refresh(assignment)
-        return assignment
+        broker.publish(changes)
+        return self.reload(statements.assignment_by_id, assignment.id)
+
+    def create_many(
+        self, data: Sequence[AssignmentPostModel]
+    ) -> List[Union[AssignmentModel, ServiceException]]:
+        """
+        Create assignments in one transaction: one multi-row INSERT with
+        RETURNING for the assignments, one for their change log entries, and
+        one commit (larger batches are split at SQLite's bound variable
+        limit). If a row violates a constraint, the batch is
+        retried with a savepoint per row, so only the offending rows fail.
+        Rows whose student is not enrolled in the classroom fail without being
+        sent. Returns a model or an exception per item, in order.
+        """
+        not_enrolled = {
+            index
+            for index, item in enumerate(data)
+            if not self.is_enrolled(item.classroom_id, item.student_id)
+        }
+        rows = [
+            {
+                "title": item.title,
+                "body": item.body,
+                "submission_date": item.submission_date or datetime.utcnow(),
+                "classroom_id": item.classroom_id,
+                "student_id": item.student_id,
+            }
+            for index, item in enumerate(data)
+            if index not in not_enrolled
+        ]
+        try:
+            results = self.insert_many(rows)
+        except IntegrityError:
+            self.database.rollback()
+            results = []
+            for row in rows:
+                try:
+                    with self.database.begin_nested():
+                        results.extend(self.insert_many([row]))
+                except IntegrityError:
+                    results.append(ServiceException("Could not create assignment"))
+        if not_enrolled:
+            created = iter(results)
+            results = [
+                ServiceException("Student is not enrolled in the classroom")
+                if index in not_enrolled
+                else next(created)
+                for index in range(len(data))
+            ]
+        changes = self.record_created(
+            [result for result in results if isinstance(result, AssignmentModel)]
+        )
+        self.database.commit()
+        broker.publish(changes)
+        return results
+
+    def insert_many(self, rows: List[Dict]) -> List[AssignmentModel]:
+        if not rows:
+            return []
+        values, stored = [], []
+        for row in rows:
+            body, body_stored = body_values(row["body"])
+            values.append(
+                {key: value for key, value in row.items() if key != "body"} | body
+            )
+            if body_stored:
+                stored.append(body_stored)
+        store_bodies(self.database, stored)
+        ids = self.insert_values(Assignment, Assignment.id, values)
+        return [
+            AssignmentModel(
+                id=id, classroom=row["classroom_id"], student=row["student_id"], **row
+            )
+            for id, row in zip(ids, rows)
+        ]
+
+    def record_created(
+        self, assignments: List[AssignmentModel]
+    ) -> List[AssignmentChangeModel]:
+        """
+        Bulk counterpart of `record_change` for newly created assignments.
+        """
+        if not assignments:
+            return []
+        rows = [
+            {
+                "action": "create",
+                "assignment_id": assignment.id,
+                "classroom_id": assignment.classroom_id,
+                "data": assignment.model_dump(
+                    mode="json", exclude={"body", "classroom", "student"}
+                ),
+            }
+            for assignment in assignments
+        ]
+        seqs = self.insert_values(AssignmentChange, AssignmentChange.seq, rows)
+        return [AssignmentChangeModel(seq=seq, **row) for seq, row in zip(seqs, rows)]
 
     def update(self, id: int, data: AssignmentUpdateModel) -> Optional[Assignment]:
-        if assignment := self.database.scalar(select(Assignment).where(Assignment.id == id)):
+        if assignment := self.database.scalar(statements.assignment_by_id, {"id": id}):
+            classroom_id = assignment.classroom_id
             if data.title:
                 assignment.title = data.title
             if data.body:
@@ -243,22 +695,38 @@ class AssignmentService(BaseService):
                 assignment.classroom_id = data.classroom_id
             if data.student_id:
                 assignment.student_id = data.student_id
+            if (data.classroom_id or data.student_id) and not self.is_enrolled(
+                assignment.classroom_id, assignment.student_id
+            ):
+                self.database.rollback()
+                raise ServiceException("Student is not enrolled in the classroom")
             try:
+                if assignment.classroom_id != classroom_id:
+                    # Moved: gone from the old classroom's feed, new in the other.
+                    changes = [
+                        self.record_change("delete", assignment, classroom_id),
+                        self.record_change("create", assignment),
+                    ]
+                else:
+                    changes = [self.record_change("update", assignment)]
                 self.database.commit()
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException("Could not update assignment")
-            return assignment
+            broker.publish(changes)
+            return self.reload(statements.assignment_by_id, id)
         return None
 
     def delete(self, id: int) -> None:
-        if assignment := self.database.scalar(select(Assignment).where(Assignment.id == id)):
+        if assignment := self.database.scalar(statements.assignment_by_id, {"id": id}):
             try:
+                changes = [self.record_change("delete", assignment)]
                 self.database.delete(assignment)
                 self.database.commit()
             except IntegrityError:
                 self.database.rollback()
                 raise ServiceException("Could not delete assignment")
+            broker.publish(changes)
         return None
 
 
@@ -0,0 +1,211 @@
+"""
+Slow query log.
+
+Statements slower than `SLOW_QUERY_MS` are written as JSON lines to a rotating
+log with their redacted parameters, duration, the route and service method
+that issued them, and their `EXPLAIN QUERY PLAN`. A summary per statement is
+kept in memory for `/debug/slow-queries`.
+
+SQLite does most of a SELECT's work while its rows are fetched, after
+`cursor.execute` has returned. `select()` statements run through a Session
+are therefore timed until their rows are fetched; other statements, and any
+run on a bare connection, are timed by `cursor.execute` alone.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import Engine, Result, event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app import config
+
+logger = logging.getLogger("app.slow_queries")
+logger.propagate = False
+if config.SLOW_QUERY_LOG:
+    _handler = RotatingFileHandler(
+        config.SLOW_QUERY_LOG,
+        maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=config.SLOW_QUERY_LOG_BACKUPS,
+        delay=True,
+    )
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+async def track_route(request: Request) -> None:
+    """
+    App dependency recording the matched route for statements it issues.
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    current_route.set(f"{request.method} {path}")
+
+
+def redact(parameters: Any) -> Any:
+    """
+    Replace bound values with their type, keeping the length of strings.
+    """
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    if isinstance(parameters, (str, bytes)):
+        return f"<{type(parameters).__name__} len={len(parameters)}>"
+    return f"<{type(parameters).__name__}>"
+
+
+def service_method() -> Optional[str]:
+    """
+    The innermost `app.services` method on the calling thread's stack.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == "app.services":
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, max_statements: int) -> None:
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self.statements: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.engine: Optional[Engine] = None
+        # The session execution being timed in this context, if any.
+        self.execution: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+            "slow_query_execution", default=None
+        )
+
+    def install(self, engine: Engine) -> None:
+        self.engine = engine
+        event.listen(engine, "before_cursor_execute", self.before_execute)
+        event.listen(engine, "after_cursor_execute", self.after_execute)
+        event.listen(Session, "do_orm_execute", self.orm_execute)
+
+    def orm_execute(self, state: ORMExecuteState) -> Optional[Result]:
+        """
+        Run a session execution and buffer the rows of a SELECT, so fetching
+        them is timed. Loads it triggers, such as selectinload queries, are timed on
+        their own and not counted against it.
+        """
+        bind = state.session.get_bind()
+        if getattr(bind, "engine", bind) is not self.engine:
+            return None
+        parent = self.execution.get()
+        execution: Dict[str, Any] = {"statement": None, "nested": 0.0}
+        token = self.execution.set(execution)
+        start = time.perf_counter()
+        try:
+            result = state.invoke_statement()
+            # SELECTs only: SQLite runs DML, RETURNING or not, in its first
+            # step, and text() statements may return no rows.
+            frozen = result.freeze() if state.is_select else None
+        finally:
+            duration = time.perf_counter() - start
+            self.execution.reset(token)
+            if parent is not None:
+                parent["nested"] += duration
+        if execution["statement"] is not None:
+            self.finish(duration - execution["nested"], **execution["statement"])
+        return frozen() if frozen is not None else result
+
+    def before_execute(
+        self, connection, cursor, statement, parameters, context, executemany
+    ) -> None:
+        # Kept on the statement's own context: nothing is left behind when
+        # the statement raises and after_cursor_execute never runs.
+        context.slow_query_start = time.perf_counter()
+
+    def after_execute(
+        self, connection, cursor, statement, parameters, context, executemany
+    ) -> None:
+        call = {
+            "connection": connection,
+            "statement": statement,
+            "parameters": parameters,
+            "executemany": executemany,
+        }
+        if execution := self.execution.get():
+            # Timed by orm_execute, through fetching. Statements after the
+            # first (batches of one execution) count towards the first.
+            if execution["statement"] is None:
+                execution["statement"] = call
+            return None
+        self.finish(time.perf_counter() - context.slow_query_start, **call)
+
+    def finish(
+        self, duration, connection, statement, parameters, executemany
+    ) -> None:
+        if duration < self.threshold:
+            return None
+        entry = {
+            "time": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "parameters": redact(parameters),
+            "executemany": executemany,
+            "route": current_route.get(),
+            "service": service_method(),
+            "plan": self.explain(connection, statement, parameters, executemany),
+        }
+        logger.info(json.dumps(entry, default=str))
+        self.record(entry)
+
+    def explain(self, connection, statement, parameters, executemany) -> List[str]:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        try:
+            # A separate cursor, so the statement's own results are untouched.
+            cursor = connection.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return [row[-1] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as exception:
+            return [f"EXPLAIN failed: {exception}"]
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            summary = self.statements.pop(entry["statement"], None) or {
+                "statement": entry["statement"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            }
+            summary["count"] += 1
+            summary["total_ms"] += entry["duration_ms"]
+            summary["max_ms"] = max(summary["max_ms"], entry["duration_ms"])
+            summary["last"] = entry
+            self.statements[entry["statement"]] = summary
+            if len(self.statements) > self.max_statements:
+                self.statements.popitem(last=False)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            statements = [dict(summary) for summary in self.statements.values()]
+        return sorted(statements, key=lambda summary: -summary["total_ms"])
+
+
+slow_query_log = SlowQueryLog(config.SLOW_QUERY_MS, config.SLOW_QUERY_MAX_STATEMENTS)
@@ -0,0 +1,121 @@
+"""
+Pre-built statements for the service layer.
+
+Statements are constructed once at import with bind parameters, so a service
+call only binds values. Building a `select()` per call costs construction and
+cache key generation on every request; a module level statement memoizes its
+cache key and hits the engine's compiled cache (sized by
+`config.SQL_QUERY_CACHE_SIZE`) directly.
+
+Model statements eager-load the relationships their response models read,
+so serialization on the event loop never lazy-loads.
+"""
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db import (
+    Assignment,
+    AssignmentBody,
+    AssignmentChange,
+    Classroom,
+    School,
+    UserAccount,
+    archived_assignment_table,
+    classroom_user_account_table,
+)
+
+
+def _by_id(stmt, model):
+    return stmt.where(model.id == bindparam("id"))
+
+
+def _by_ids(stmt, model):
+    return stmt.where(model.id.in_(bindparam("ids", expanding=True)))
+
+
+# School
+
+school_list = select(School).options(
+    selectinload(School.classrooms), selectinload(School.user_accounts)
+)
+school_by_id = _by_id(school_list, School)
+school_list_by_ids = _by_ids(school_list, School)
+
+
+# Classroom
+
+classroom_list = select(Classroom).options(selectinload(Classroom.user_accounts))
+classroom_by_id = _by_id(classroom_list, Classroom)
+classroom_list_by_ids = _by_ids(classroom_list, Classroom)
+
+
+# UserAccount
+
+user_account_list = select(UserAccount).options(selectinload(UserAccount.classrooms))
+user_account_by_id = _by_id(user_account_list, UserAccount)
+user_account_list_by_ids = _by_ids(user_account_list, UserAccount)
+
+# The member's is_student flag, or no row if not a member.
+membership = (
+    select(UserAccount.is_student)
+    .join(
+        classroom_user_account_table,
+        classroom_user_account_table.c.user_account_id == UserAccount.id,
+    )
+    .where(classroom_user_account_table.c.classroom_id == bindparam("classroom_id"))
+    .where(UserAccount.id == bindparam("user_account_id"))
+)
+
+
+# Assignment
+
+_assignment = select(Assignment).options(
+    joinedload(Assignment.classroom), joinedload(Assignment.student)
+)
+assignment_by_id = _by_id(_assignment, Assignment)
+
+# Keyed by (filter by classroom name, filter by student name).
+assignment_list = {
+    (False, False): _assignment,
+    (True, False): _assignment.join(Assignment.classroom).where(
+        Classroom.name == bindparam("classroom_name")
+    ),
+    (False, True): _assignment.join(Assignment.student).where(
+        UserAccount.name == bindparam("student_name")
+    ),
+    (True, True): _assignment.join(Assignment.classroom)
+    .where(Classroom.name == bindparam("classroom_name"))
+    .join(Assignment.student)
+    .where(UserAccount.name == bindparam("student_name")),
+}
+
+# Archived assignments, with their stored body when they have one.
+_archived = archived_assignment_table.c
+_archived_select = select(
+    archived_assignment_table, AssignmentBody.data.label("stored_body")
+).outerjoin(AssignmentBody, AssignmentBody.hash == _archived.body_hash)
+
+archived_assignment_list = {
+    (False, False): _archived_select,
+    (True, False): _archived_select.join(
+        Classroom, Classroom.id == _archived.classroom_id
+    ).where(Classroom.name == bindparam("classroom_name")),
+    (False, True): _archived_select.join(
+        UserAccount, UserAccount.id == _archived.student_id
+    ).where(UserAccount.name == bindparam("student_name")),
+    (True, True): _archived_select.join(
+        Classroom, Classroom.id == _archived.classroom_id
+    )
+    .where(Classroom.name == bindparam("classroom_name"))
+    .join(UserAccount, UserAccount.id == _archived.student_id)
+    .where(UserAccount.name == bindparam("student_name")),
+}
+
+assignment_changes_since = (
+    select(AssignmentChange)
+    .where(AssignmentChange.classroom_id == bindparam("classroom_id"))
+    .where(AssignmentChange.seq > bindparam("since"))
+    .order_by(AssignmentChange.seq)
+    .limit(bindparam("limit"))
+)
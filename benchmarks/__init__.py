@@ -0,0 +1,6 @@
+import os
+
+# Benchmarks seed their own temporary databases and override get_database.
+# Point the application's engine at an in-memory database, so importing
+# `app.app` never creates ./app.db.
+os.environ["DATABASE_URL"] = "sqlite://"
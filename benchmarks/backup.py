@@ -0,0 +1,103 @@
+"""
+Throughput and latency of a read/write load with and without an online
+backup running alongside it.
+
+    $ uv run python -m benchmarks.backup
+"""
+
+import os
+import random
+import statistics
+import threading
+import time
+from typing import List
+
+from sqlalchemy.exc import OperationalError
+
+from app.backup import copy_database
+from app.exceptions import BackupError, ServiceException
+from app.membership import membership_index
+from app.schemas import AssignmentPostModel
+from app.services import AssignmentService
+from benchmarks.common import create_database, seed
+
+CLIENTS = 4
+DURATION = 3.0
+WRITE_RATIO = 0.2
+
+
+def load(session_factory, stop: threading.Event, latencies: List[float]) -> None:
+    rng = random.Random(threading.get_ident())
+    with session_factory() as session:
+        service = AssignmentService(session)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if rng.random() < WRITE_RATIO:
+                    # Seeded students 2-31 are enrolled in classroom 1.
+                    service.create(
+                        AssignmentPostModel(
+                            title="Load",
+                            body="x" * 200,
+                            classroom_id=1,
+                            student_id=rng.randint(2, 31),
+                        )
+                    )
+                else:
+                    service.get(rng.randint(1, 4000))
+                    session.expunge_all()
+            except (OperationalError, ServiceException):
+                session.rollback()
+                continue
+            latencies.append(time.perf_counter() - start)
+
+
+def measure(label: str, engine, session_factory, with_backup: bool) -> None:
+    stop = threading.Event()
+    latencies: List[float] = []
+    threads = [
+        threading.Thread(target=load, args=(session_factory, stop, latencies))
+        for _ in range(CLIENTS)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION / 3)
+    backup = ""
+    started = time.perf_counter()
+    if with_backup:
+        target = f"{engine.url.database}.backup"
+        try:
+            result = copy_database(engine.url.database, target)
+            backup = f"{result['duration_ms']:.0f} ms, {result['restarts']} restarts"
+        except BackupError as e:
+            backup = str(e)
+        if os.path.exists(target):
+            os.remove(target)
+    time.sleep(max(0.0, DURATION - DURATION / 3 - (time.perf_counter() - started)))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(
+        f"{label:<10}{len(latencies) / DURATION:>10.0f} ops/s"
+        f"{statistics.median(latencies) * 1000:>9.2f} ms{p99:>9.2f} ms  {backup}"
+    )
+
+
+def run() -> None:
+    engine, session_factory = create_database()
+    with session_factory() as session:
+        seed(session, classrooms=40, students=30, assignments=3, body_size=3000)
+        membership_index.load(session)
+    size = os.path.getsize(engine.url.database) / 1024 / 1024
+    print(f"{size:.1f} MiB database, {CLIENTS} clients, {WRITE_RATIO:.0%} writes")
+    print(f"{'':<10}{'throughput':>16}{'p50':>12}{'p99':>12}  backup")
+    measure("baseline", engine, session_factory, with_backup=False)
+    measure("backup", engine, session_factory, with_backup=True)
+    engine.dispose()
+    os.remove(engine.url.database)
+
+
+if __name__ == "__main__":
+    run()
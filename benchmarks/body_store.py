@@ -0,0 +1,60 @@
+"""
+Disk footprint and list-scan speed with assignment bodies inline versus in
+the compressed, deduplicated body store.
+
+    $ uv run python -m benchmarks.body_store
+"""
+
+import os
+import time
+
+from sqlalchemy import select, text
+
+from app import config
+from app.db import Assignment
+from app.services import AssignmentService
+from benchmarks.common import create_database, seed
+
+ITERATIONS = 20
+
+
+def measure(store: bool) -> None:
+    config.BODY_STORE_ENABLED = store
+    engine, session_factory = create_database()
+    with session_factory() as session:
+        seed(session, classrooms=20, students=30, assignments=4, body_size=4000)
+    with engine.connect() as connection:
+        connection.execute(text("VACUUM"))
+    size = os.path.getsize(engine.url.database)
+
+    with session_factory() as session:
+        stmt = select(Assignment.id, Assignment.title)
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            session.execute(stmt).all()
+        scan = (time.perf_counter() - start) / ITERATIONS * 1000
+
+        service = AssignmentService(session)
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            service.get_list()
+            session.expunge_all()
+        full = (time.perf_counter() - start) / ITERATIONS * 1000
+
+    label = "body store" if store else "inline"
+    print(
+        f"{label:<12}{size / 1024 / 1024:>10.1f} MiB"
+        f"{scan:>14.2f} ms{full:>14.2f} ms"
+    )
+    engine.dispose()
+    os.remove(engine.url.database)
+
+
+def run() -> None:
+    print(f"{'':<12}{'file size':>14}{'id/title scan':>17}{'get_list':>17}")
+    for store in (False, True):
+        measure(store)
+
+
+if __name__ == "__main__":
+    run()
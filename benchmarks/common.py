@@ -0,0 +1,158 @@
+import os
+import random
+import tempfile
+from datetime import datetime
+from typing import Iterator, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import (
+    Assignment,
+    Base,
+    Classroom,
+    School,
+    UserAccount,
+    body_values,
+    classroom_user_account_table,
+    enable_savepoints,
+    store_bodies,
+)
+from app.dependencies import get_database
+from app.membership import membership_index
+
+
+def create_database(path: str = "") -> Tuple[Engine, sessionmaker]:
+    """
+    Create a schema in a fresh SQLite file. Uses a temporary file if no path
+    is given.
+    """
+    if not path:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    enable_savepoints(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or "
+    "his from at which but have an they you were her she there been one all"
+).split()
+
+
+def body_text(key: object, size: int) -> str:
+    """
+    Deterministic prose-like text of about `size` characters for `key`.
+    """
+    rng = random.Random(str(key))
+    words: list = []
+    length = 0
+    while length < size:
+        words.append(rng.choice(WORDS))
+        length += len(words[-1]) + 1
+    return " ".join(words)[:size]
+
+
+def seed(
+    session: Session,
+    schools: int = 1,
+    classrooms: int = 10,
+    students: int = 30,
+    assignments: int = 2,
+    body_size: int = 200,
+) -> None:
+    """
+    Bulk insert `schools` schools, each with `classrooms` classrooms, one
+    teacher and `students` students per classroom, and `assignments`
+    assignments per student. Even-numbered assignments have the same body
+    for every student, as a shared template would.
+    """
+    school_rows, classroom_rows, user_rows = [], [], []
+    member_rows, assignment_rows, stored_rows = [], [], []
+    classroom_id = user_id = assignment_id = 0
+    for school_id in range(1, schools + 1):
+        school_rows.append({"id": school_id, "name": f"School {school_id}"})
+        for _ in range(classrooms):
+            classroom_id += 1
+            classroom_rows.append(
+                {
+                    "id": classroom_id,
+                    "name": f"Classroom {classroom_id}",
+                    "school_id": school_id,
+                }
+            )
+            for index in range(students + 1):
+                user_id += 1
+                user_rows.append(
+                    {
+                        "id": user_id,
+                        "name": f"User {user_id}",
+                        "email": f"u{user_id}@test.example",
+                        "is_student": index > 0,
+                        "school_id": school_id,
+                    }
+                )
+                member_rows.append(
+                    {"classroom_id": classroom_id, "user_account_id": user_id}
+                )
+                if index == 0:
+                    continue
+                for number in range(assignments):
+                    assignment_id += 1
+                    key = number if number % 2 == 0 else (user_id, number)
+                    body, stored = body_values(body_text(key, body_size))
+                    if stored:
+                        stored_rows.append(stored)
+                    assignment_rows.append(
+                        {
+                            "id": assignment_id,
+                            "title": f"Assignment {number}",
+                            "submission_date": datetime(2025, 9, 1),
+                            "classroom_id": classroom_id,
+                            "student_id": user_id,
+                            **body,
+                        }
+                    )
+    store_bodies(session, stored_rows)
+    for model, rows in (
+        (School, school_rows),
+        (Classroom, classroom_rows),
+        (UserAccount, user_rows),
+        (classroom_user_account_table, member_rows),
+        (Assignment, assignment_rows),
+    ):
+        if rows:
+            session.execute(insert(model), rows)
+    session.commit()
+
+
+def client_for(session_factory: sessionmaker) -> Iterator[TestClient]:
+    """
+    Yield a TestClient for the application bound to `session_factory`, with
+    rate limiting off so benchmarks measure real responses.
+    """
+    from app.admission import rate_limit
+    from app.app import app
+
+    def override() -> Iterator[Session]:
+        database = session_factory()
+        try:
+            yield database
+        finally:
+            database.close()
+
+    with session_factory() as database:
+        membership_index.load(database)
+    app.dependency_overrides[get_database] = override
+    rate, rate_limit.rate = rate_limit.rate, 0
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        rate_limit.rate = rate
+        app.dependency_overrides.pop(get_database, None)
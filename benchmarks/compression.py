@@ -0,0 +1,46 @@
+"""
+Bytes on the wire and server CPU cost of the list endpoints, with and without
+gzip.
+
+    $ uv run python -m benchmarks.compression
+"""
+
+import time
+
+from benchmarks.common import client_for, create_database, seed
+
+ENDPOINTS = [
+    "/school/",
+    "/school/?id_format=ranges",
+    "/classroom/",
+    "/user/",
+    "/assignment/",
+]
+ITERATIONS = 20
+
+
+def run() -> None:
+    engine, session_factory = create_database()
+    with session_factory() as session:
+        seed(session, schools=2, classrooms=20, students=30, assignments=2)
+
+    print(f"{'endpoint':<28}{'encoding':<10}{'bytes':>10}{'cpu ms/req':>12}")
+    for client in client_for(session_factory):
+        for endpoint in ENDPOINTS:
+            for encoding in ("identity", "gzip"):
+                headers = {"Accept-Encoding": encoding}
+                response = client.get(endpoint, headers=headers)
+                assert response.status_code == 200, response.text
+                start = time.process_time()
+                for _ in range(ITERATIONS):
+                    assert client.get(endpoint, headers=headers).status_code == 200
+                cpu = (time.process_time() - start) / ITERATIONS * 1000
+                print(
+                    f"{endpoint:<28}{encoding:<10}"
+                    f"{response.num_bytes_downloaded:>10}{cpu:>12.2f}"
+                )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,123 @@
+"""
+Memory and lookup cost of the membership index at a million memberships,
+against a dict of sets and against asking the database.
+
+    $ uv run python -m benchmarks.membership_index
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+from sqlalchemy import bindparam, exists, insert, select
+
+from app.db import Classroom, School, UserAccount, classroom_user_account_table
+from app.membership import MembershipIndex
+from benchmarks.common import create_database
+
+CLASSROOMS = 10_000
+MEMBERS = 100
+USERS = 100_000
+LOOKUPS = 100_000
+
+
+def populate(session) -> None:
+    rng = random.Random(0)
+    session.execute(insert(School), [{"id": 1, "name": "School"}])
+    session.execute(
+        insert(Classroom),
+        [
+            {"id": id, "name": f"Classroom {id}", "school_id": 1}
+            for id in range(1, CLASSROOMS + 1)
+        ],
+    )
+    session.execute(
+        insert(UserAccount),
+        [
+            {
+                "id": id,
+                "name": f"User {id}",
+                "email": f"u{id}@test.example",
+                "is_student": id % 10 != 0,
+            }
+            for id in range(1, USERS + 1)
+        ],
+    )
+    session.execute(
+        insert(classroom_user_account_table),
+        [
+            {"classroom_id": classroom_id, "user_account_id": user_id}
+            for classroom_id in range(1, CLASSROOMS + 1)
+            for user_id in rng.sample(range(1, USERS + 1), MEMBERS)
+        ],
+    )
+    session.commit()
+
+
+def timed_lookups(check, pairs) -> float:
+    start = time.perf_counter()
+    for classroom_id, user_id in pairs:
+        check(classroom_id, user_id)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def run() -> None:
+    engine, session_factory = create_database()
+    with session_factory() as session:
+        populate(session)
+
+        index = MembershipIndex()
+        start = time.perf_counter()
+        index.load(session)
+        load = time.perf_counter() - start
+        tracemalloc.start()
+        index.load(session)
+        index_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        member = classroom_user_account_table.c
+        tracemalloc.start()
+        sets: dict = {}
+        for classroom_id, user_id in session.execute(
+            select(member.classroom_id, member.user_account_id)
+        ):
+            sets.setdefault(classroom_id, set()).add(user_id)
+        sets_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        rng = random.Random(1)
+        pairs = [
+            (rng.randint(1, CLASSROOMS), rng.randint(1, USERS)) for _ in range(LOOKUPS)
+        ]
+        stmt = select(
+            exists()
+            .where(member.classroom_id == bindparam("classroom_id"))
+            .where(member.user_account_id == bindparam("user_id"))
+            .where(UserAccount.id == member.user_account_id)
+            .where(UserAccount.is_student)
+        )
+        query_pairs = pairs[: LOOKUPS // 20]
+
+        def query(classroom_id, user_id):
+            return session.scalar(
+                stmt, {"classroom_id": classroom_id, "user_id": user_id}
+            )
+
+        print(f"{CLASSROOMS * MEMBERS:,} memberships, load {load:.2f} s")
+        print(f"{'':<14}{'memory':>12}{'lookup':>14}")
+        print(
+            f"{'index':<14}{index_memory / 1024 / 1024:>8.1f} MiB"
+            f"{timed_lookups(index.is_student, pairs):>11.2f} us"
+        )
+        print(
+            f"{'dict of sets':<14}{sets_memory / 1024 / 1024:>8.1f} MiB"
+            f"{timed_lookups(lambda c, u: u in sets.get(c, ()), pairs):>11.2f} us"
+        )
+        print(f"{'query':<14}{'-':>12}{timed_lookups(query, query_pairs):>11.2f} us")
+    engine.dispose()
+    os.remove(engine.url.database)
+
+
+if __name__ == "__main__":
+    run()
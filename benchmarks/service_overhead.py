@@ -0,0 +1,75 @@
+"""
+Per-call overhead of the service layer, building statements per call (as the
+services did before `app.statements`) versus the pre-built registry. Both
+sides use the same loader options, so only statement construction differs.
+
+    $ uv run python -m benchmarks.service_overhead
+"""
+
+import time
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.db import Assignment, Classroom, School, UserAccount
+from app.services import AssignmentService, SchoolService
+from benchmarks.common import create_database, seed
+
+ITERATIONS = 5000
+
+
+def timed(label: str, func: Callable[[int], object]) -> None:
+    func(1)
+    start = time.perf_counter()
+    for index in range(ITERATIONS):
+        func(index % 2 + 1)
+    elapsed = (time.perf_counter() - start) / ITERATIONS * 1_000_000
+    print(f"{label:<40}{elapsed:>10.1f} us/call")
+
+
+def run() -> None:
+    engine, session_factory = create_database()
+    with session_factory() as session:
+        seed(session, schools=2, classrooms=2, students=5, assignments=1)
+
+    with session_factory() as session:
+        schools = SchoolService(session)
+        assignments = AssignmentService(session)
+
+        timed(
+            "school get, select per call",
+            lambda id: session.scalar(
+                select(School)
+                .options(
+                    selectinload(School.classrooms),
+                    selectinload(School.user_accounts),
+                )
+                .where(School.id == id)
+            ),
+        )
+        timed("school get, registry", schools.get)
+
+        def assignment_list_per_call(id: int) -> object:
+            stmt = (
+                select(Assignment)
+                .options(
+                    joinedload(Assignment.classroom), joinedload(Assignment.student)
+                )
+                .join(Assignment.classroom)
+                .where(Classroom.name == f"Classroom {id}")
+                .join(Assignment.student)
+                .where(UserAccount.name == "User 2")
+            )
+            return session.scalars(stmt).all()
+
+        timed("assignment list, select per call", assignment_list_per_call)
+        timed(
+            "assignment list, registry",
+            lambda id: assignments.get_list(f"Classroom {id}", "User 2"),
+        )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from app.admission import rate_limit
+
+
+@pytest.fixture
+def selects_off_executor(engine):
+    """
+    SELECTs issued outside the database executor, e.g. lazy loads fired while
+    the response is serialized on the event loop.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            if not threading.current_thread().name.startswith("db"):
+                statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_responses_are_loaded_inside_admission(client, selects_off_executor):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    student = client.post(
+        "/user/",
+        json={
+            "name": "Student",
+            "email": "student@test.example",
+            "school_id": school["id"],
+            "classrooms": [classroom["id"]],
+        },
+    ).json()
+    assignment = client.post(
+        "/assignment/",
+        json={
+            "title": "Essay",
+            "body": "text",
+            "classroom_id": classroom["id"],
+            "student_id": student["id"],
+        },
+    ).json()
+    responses = [
+        client.get("/school/"),
+        client.get(f"/school/{school['id']}"),
+        client.patch(f"/school/{school['id']}", json={"name": "Renamed"}),
+        client.get("/classroom/"),
+        client.get(f"/classroom/{classroom['id']}"),
+        client.patch(
+            f"/classroom/{classroom['id']}", json={"user_accounts": [student["id"]]}
+        ),
+        client.get("/user/"),
+        client.get(f"/user/{student['id']}"),
+        client.patch(f"/user/{student['id']}", json={"name": "Renamed"}),
+        client.get("/assignment/"),
+        client.get(f"/assignment/{assignment['id']}"),
+        client.patch(f"/assignment/{assignment['id']}", json={"title": "Draft"}),
+    ]
+    assert [response.status_code for response in responses] == [200] * 12
+    assert responses[0].json()[0]["classrooms"] == [classroom["id"]]
+    assert responses[4].json()["user_accounts"] == [student["id"]]
+    assert responses[7].json()["classrooms"] == [classroom["id"]]
+    assert responses[10].json()["student"] == student["id"]
+    assert selects_off_executor == []
+
+
+def test_rate_limit(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "rate", 1)
+    monkeypatch.setattr(rate_limit, "burst", 2)
+    monkeypatch.setattr(rate_limit, "buckets", type(rate_limit.buckets)())
+    codes = [client.get("/school/").status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import config
+from app.archive import archive_assignments
+from app.bodies import prune
+from app.db import (
+    AssignmentBody,
+    Base,
+    archive_metadata,
+    archived_assignment_table,
+    attach_archive,
+    enable_savepoints,
+)
+from app.exceptions import BodyStoreError, MissingBodyError
+from app.membership import membership_index
+from app.schemas import (
+    AssignmentPostModel,
+    ClassroomPostModel,
+    SchoolPostModel,
+    UserAccountPostModel,
+)
+from app.services import (
+    AssignmentService,
+    ClassroomService,
+    SchoolService,
+    UserAccountService,
+)
+
+
+@pytest.fixture
+def archived_database(tmp_path):
+    # ATTACH cannot run inside the rolled-back test transaction, so the
+    # archive tests use their own files.
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    enable_savepoints(engine)
+    attach_archive(engine, str(tmp_path / "archive.db"))
+    Base.metadata.create_all(bind=engine)
+    archive_metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as database:
+        membership_index.load(database)
+        yield database
+    engine.dispose()
+
+
+def submit(database, classroom_id, student_id, title, days_ago, body="text"):
+    return AssignmentService(database).create(
+        AssignmentPostModel(
+            title=title,
+            body=body,
+            submission_date=datetime.utcnow() - timedelta(days=days_ago),
+            classroom_id=classroom_id,
+            student_id=student_id,
+        )
+    )
+
+
+def test_archived_ids_are_not_reused(archived_database):
+    database = archived_database
+    school = SchoolService(database).create(SchoolPostModel(name="School"))
+    classroom = ClassroomService(database).create(
+        ClassroomPostModel(name="Classroom", school_id=school.id)
+    )
+    student = UserAccountService(database).create(
+        UserAccountPostModel(
+            name="Student",
+            email="student@test.example",
+            school_id=school.id,
+            classrooms=[classroom.id],
+        )
+    )
+    for title in ("One", "Two"):
+        submit(database, classroom.id, student.id, title, days_ago=400)
+    cutoff = datetime.utcnow() - timedelta(days=365)
+    assert archive_assignments(database, cutoff) == 2
+
+    newer = submit(database, classroom.id, student.id, "Three", days_ago=400)
+    assert newer.id == 3
+    assert archive_assignments(database, cutoff) == 1
+
+    assignments = AssignmentService(database).get_list(include_archived=True)
+    assert sorted(assignment.id for assignment in assignments) == [1, 2, 3]
+
+
+def test_archive_run_reserves_ids_archived_before_autoincrement(archived_database):
+    database = archived_database
+    school = SchoolService(database).create(SchoolPostModel(name="School"))
+    classroom = ClassroomService(database).create(
+        ClassroomPostModel(name="Classroom", school_id=school.id)
+    )
+    student = UserAccountService(database).create(
+        UserAccountPostModel(
+            name="Student",
+            email="student@test.example",
+            school_id=school.id,
+            classrooms=[classroom.id],
+        )
+    )
+    # An archive written while the table still reused ids.
+    database.execute(
+        insert(archived_assignment_table),
+        [
+            {
+                "id": 50,
+                "title": "Old",
+                "body": "text",
+                "submission_date": datetime(2020, 1, 1),
+                "classroom_id": classroom.id,
+                "student_id": student.id,
+                "archived_at": datetime(2021, 1, 1),
+            }
+        ],
+    )
+    database.commit()
+    archive_assignments(database, datetime.utcnow() - timedelta(days=365))
+    assert submit(database, classroom.id, student.id, "New", days_ago=0).id == 51
+
+
+def test_prune_needs_the_archive_for_archived_bodies(
+    archived_database, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(config, "BODY_STORE_ENABLED", True)
+    database = archived_database
+    school = SchoolService(database).create(SchoolPostModel(name="School"))
+    classroom = ClassroomService(database).create(
+        ClassroomPostModel(name="Classroom", school_id=school.id)
+    )
+    student = UserAccountService(database).create(
+        UserAccountPostModel(
+            name="Student",
+            email="student@test.example",
+            school_id=school.id,
+            classrooms=[classroom.id],
+        )
+    )
+    body = "word " * config.BODY_STORE_MIN_SIZE
+    submit(database, classroom.id, student.id, "Old", days_ago=400, body=body)
+    assert archive_assignments(database, datetime.utcnow() - timedelta(days=365)) == 1
+
+    detached = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with sessionmaker(bind=detached)() as other:
+        with pytest.raises(BodyStoreError):
+            prune(other)
+    detached.dispose()
+
+    assert prune(database) == 0
+    [archived] = AssignmentService(database).get_list(include_archived=True)
+    assert archived.body == body
+
+    # Lost all the same: reported by name rather than failing validation.
+    database.execute(delete(AssignmentBody))
+    database.commit()
+    with pytest.raises(MissingBodyError):
+        AssignmentService(database).get_list(include_archived=True)
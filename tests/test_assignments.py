@@ -0,0 +1,180 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select, text
+
+from app.admission import Admission
+from app.batching import AssignmentBatcher
+from app.db import AssignmentChange, UserAccount
+from app.exceptions import ServiceException
+from app.schemas import AssignmentModel, AssignmentPostModel
+from app.services import AssignmentService
+
+
+@pytest.fixture
+def enrolment(client):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    student, outsider = (
+        client.post(
+            "/user/",
+            json={
+                "name": name,
+                "email": f"{name}@test.example",
+                "school_id": school["id"],
+                "classrooms": classrooms,
+            },
+        ).json()["id"]
+        for name, classrooms in (("student", [classroom["id"]]), ("outsider", []))
+    )
+    return classroom["id"], student, outsider
+
+
+@pytest.fixture
+def reject_bad_titles(database):
+    # A constraint the batch INSERT cannot satisfy for one row only.
+    database.execute(
+        text(
+            "CREATE TRIGGER reject_bad_title BEFORE INSERT ON assignment"
+            " WHEN NEW.title = 'bad' BEGIN SELECT RAISE(ABORT, 'bad title'); END"
+        )
+    )
+    database.commit()
+
+
+def post(title, classroom_id, student_id):
+    return AssignmentPostModel(
+        title=title, body="text", classroom_id=classroom_id, student_id=student_id
+    )
+
+
+def test_create_many_sends_one_insert_per_table(connection, database, enrolment):
+    classroom_id, student, _ = enrolment
+    inserts = []
+
+    @event.listens_for(connection, "before_cursor_execute")
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            inserts.append(statement.split(" (")[0])
+
+    service = AssignmentService(database)
+    results = service.create_many(
+        [post(f"title {number}", classroom_id, student) for number in range(5)]
+    )
+    assert [result.title for result in results] == [
+        f"title {number}" for number in range(5)
+    ]
+    assert inserts == ["INSERT INTO assignment", "INSERT INTO assignment_change"]
+
+    # Split at the bound variable limit, still matched up in order.
+    inserts.clear()
+    dbapi_connection = database.connection().connection.dbapi_connection
+    limit = dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 12)
+    try:
+        results = service.create_many(
+            [post(f"split {number}", classroom_id, student) for number in range(5)]
+        )
+    finally:
+        dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+    assert len(inserts) > 2
+    for result in results:
+        change = database.scalars(
+            select(AssignmentChange).where(AssignmentChange.assignment_id == result.id)
+        ).one()
+        assert change.data["title"] == result.title
+
+
+def test_create_many_fails_offending_rows_only(database, enrolment, reject_bad_titles):
+    classroom_id, student, outsider = enrolment
+    results = AssignmentService(database).create_many(
+        [
+            post("one", classroom_id, student),
+            post("bad", classroom_id, student),
+            post("two", classroom_id, outsider),
+            post("three", classroom_id, student),
+        ]
+    )
+
+    assert [type(result) for result in results] == [
+        AssignmentModel,
+        ServiceException,
+        ServiceException,
+        AssignmentModel,
+    ]
+    assert results[1].msg == "Could not create assignment"
+    assert results[2].msg == "Student is not enrolled in the classroom"
+    assert [results[0].title, results[3].title] == ["one", "three"]
+
+    database.expire_all()
+    assert database.get(UserAccount, student).assignment_count == 2
+    changes = database.scalars(select(AssignmentChange.assignment_id)).all()
+    assert changes == [results[0].id, results[3].id]
+
+
+def test_batched_creates_fail_per_caller(session_factory, enrolment, reject_bad_titles):
+    classroom_id, student, outsider = enrolment
+    batcher = AssignmentBatcher(
+        window=60,
+        max_size=3,
+        max_queued=3,
+        session_factory=session_factory,
+        admission=Admission("write", 1, 1, 1.0),
+    )
+
+    async def submit():
+        return await asyncio.gather(
+            batcher.create(post("one", classroom_id, student)),
+            batcher.create(post("bad", classroom_id, student)),
+            batcher.create(post("two", classroom_id, outsider)),
+            return_exceptions=True,
+        )
+
+    one, bad, outsider_result = asyncio.run(submit())
+    assert one.title == "one"
+    assert bad.msg == "Could not create assignment"
+    assert outsider_result.msg == "Student is not enrolled in the classroom"
+
+
+def test_create_route_reports_failures(client, enrolment, reject_bad_titles):
+    classroom_id, student, _ = enrolment
+    response = client.post(
+        "/assignment/", json=post("bad", classroom_id, student).model_dump(mode="json")
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Could not create assignment"}
+
+
+def test_batched_creates_are_admitted(session_factory, enrolment):
+    classroom_id, student, _ = enrolment
+    admission = Admission("write", 1, 0, 1.0)
+    batcher = AssignmentBatcher(
+        window=60,
+        max_size=2,
+        max_queued=2,
+        session_factory=session_factory,
+        admission=admission,
+    )
+
+    async def submit():
+        # Writes are saturated and admission queues none.
+        await admission.semaphore.acquire()
+        first = asyncio.ensure_future(
+            batcher.create(post("one", classroom_id, student))
+        )
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as queue_full:
+            await asyncio.gather(
+                batcher.create(post("two", classroom_id, student)),
+                batcher.create(post("three", classroom_id, student)),
+            )
+        return queue_full.value, await asyncio.gather(first, return_exceptions=True)
+
+    queue_full, [rejected] = asyncio.run(submit())
+    assert queue_full.status_code == 503
+    assert "batch queue full" in queue_full.detail
+    assert rejected.status_code == 503
+    assert batcher.queued == 0
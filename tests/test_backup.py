@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+from app import backup
+from app.exceptions import BackupError
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "source.db")
+    with closing(sqlite3.connect(path)) as connection:
+        connection.execute("CREATE TABLE item (data BLOB)")
+        connection.executemany(
+            "INSERT INTO item VALUES (?)", [(os.urandom(4000),) for _ in range(100)]
+        )
+        connection.commit()
+    return path
+
+
+def count(path):
+    with closing(sqlite3.connect(path)) as connection:
+        return connection.execute("SELECT count(*) FROM item").fetchone()[0]
+
+
+def write_between_steps(monkeypatch, source, writes):
+    """
+    Write to the source from another connection while the copy sleeps, as
+    a concurrent request would, the first `writes` times.
+    """
+    sleep = time.sleep
+    remaining = [writes]
+
+    def sleep_and_write(seconds):
+        if remaining[0]:
+            remaining[0] -= 1
+            with closing(sqlite3.connect(source, timeout=0)) as connection:
+                connection.execute("INSERT INTO item VALUES (x'00')")
+                connection.commit()
+        sleep(seconds)
+
+    monkeypatch.setattr(backup.time, "sleep", sleep_and_write)
+
+
+def test_backup_and_restore(tmp_path, source):
+    target = str(tmp_path / "backup.db")
+    result = backup.copy_database(source, target, pages=8, sleep=0)
+    assert result["restarts"] == 0
+    assert count(target) == 100
+
+    restored = str(tmp_path / "restored.db")
+    backup.restore(target, restored)
+    assert count(restored) == 100
+    assert not os.path.exists(f"{restored}.partial")
+
+
+def test_existing_files_are_never_overwritten(tmp_path, source):
+    target = str(tmp_path / "backup.db")
+    backup.copy_database(source, target, sleep=0)
+    with pytest.raises(BackupError, match="already exists"):
+        backup.copy_database(source, target, sleep=0)
+    with pytest.raises(BackupError, match="already exists"):
+        backup.restore(target, source)
+
+
+def test_snapshot_names_are_unique(tmp_path):
+    names = {backup.snapshot_path(str(tmp_path)) for _ in range(100)}
+    assert len(names) > 1
+
+
+def test_restarts_grow_the_step_and_never_block_writers(tmp_path, source, monkeypatch):
+    # Each write needs the source unlocked between steps (timeout=0).
+    write_between_steps(monkeypatch, source, writes=3)
+    target = str(tmp_path / "backup.db")
+    result = backup.copy_database(source, target, pages=8, sleep=0, max_pages=32)
+    assert result["restarts"] == 3
+    assert result["pages"] == 32
+    assert count(target) == count(source)
+
+
+def test_gives_up_when_too_busy(tmp_path, source, monkeypatch):
+    write_between_steps(monkeypatch, source, writes=100)
+    target = str(tmp_path / "backup.db")
+    with pytest.raises(BackupError, match="too busy"):
+        backup.copy_database(source, target, pages=8, sleep=0, max_restarts=2)
+    assert not os.path.exists(target)
+    assert not os.path.exists(f"{target}.partial")
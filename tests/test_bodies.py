@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import delete, func, select
+
+from app import config
+from app.db import AssignmentBody
+
+
+@pytest.fixture
+def classroom(client):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    students = [
+        client.post(
+            "/user/",
+            json={
+                "name": f"Student {number}",
+                "email": f"s{number}@test.example",
+                "school_id": school["id"],
+                "classrooms": [classroom["id"]],
+            },
+        ).json()
+        for number in range(2)
+    ]
+    return classroom["id"], [student["id"] for student in students]
+
+
+def submit(client, classroom_id, student_id, body):
+    response = client.post(
+        "/assignment/",
+        json={
+            "title": "Essay",
+            "body": body,
+            "classroom_id": classroom_id,
+            "student_id": student_id,
+        },
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_large_bodies_are_stored_once(client, database, classroom, monkeypatch):
+    monkeypatch.setattr(config, "BODY_STORE_ENABLED", True)
+    classroom_id, students = classroom
+    body = "word " * config.BODY_STORE_MIN_SIZE
+    for student_id in students:
+        assert submit(client, classroom_id, student_id, body)["body"] == body
+    submit(client, classroom_id, students[0], "short")
+
+    assert database.scalar(select(func.count()).select_from(AssignmentBody)) == 1
+    bodies = [assignment["body"] for assignment in client.get("/assignment/").json()]
+    assert bodies == [body, body, "short"]
+
+
+def test_disabled_store_keeps_bodies_inline(client, database, classroom):
+    classroom_id, students = classroom
+    submit(client, classroom_id, students[0], "word " * config.BODY_STORE_MIN_SIZE)
+    assert database.scalar(select(func.count()).select_from(AssignmentBody)) == 0
+
+
+def test_dangling_body_hash_is_reported(
+    client, database, classroom, monkeypatch, caplog
+):
+    monkeypatch.setattr(config, "BODY_STORE_ENABLED", True)
+    classroom_id, students = classroom
+    assignment = submit(
+        client, classroom_id, students[0], "word " * config.BODY_STORE_MIN_SIZE
+    )
+    body_hash = database.scalar(select(AssignmentBody.hash))
+    database.execute(delete(AssignmentBody))
+    database.commit()
+
+    response = client.get(f"/assignment/{assignment['id']}")
+    assert response.status_code == 500
+    message = (
+        f"Body {body_hash} of assignment {assignment['id']} is missing from the"
+        " body store"
+    )
+    assert response.json() == {"detail": message}
+    assert message in caplog.text
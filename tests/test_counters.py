@@ -0,0 +1,75 @@
+from sqlalchemy import update
+
+from app.counters import recompute_counters
+from app.db import Classroom, School, UserAccount
+
+
+def counts(client, school_id, classroom_id, student_id):
+    school = client.get(f"/school/{school_id}").json()
+    classroom = client.get(f"/classroom/{classroom_id}").json()
+    student = client.get(f"/user/{student_id}").json()
+    return (
+        school["classroom_count"],
+        school["user_count"],
+        classroom["member_count"],
+        student["assignment_count"],
+    )
+
+
+def populate(client):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    students = [
+        client.post(
+            "/user/",
+            json={
+                "name": f"Student {number}",
+                "email": f"s{number}@test.example",
+                "school_id": school["id"],
+                "classrooms": [classroom["id"]],
+            },
+        ).json()
+        for number in range(2)
+    ]
+    for title in ("One", "Two"):
+        client.post(
+            "/assignment/",
+            json={
+                "title": title,
+                "body": "text",
+                "classroom_id": classroom["id"],
+                "student_id": students[0]["id"],
+            },
+        )
+    return school["id"], classroom["id"], students[0]["id"], students[1]["id"]
+
+
+def test_triggers_keep_counters_exact(client):
+    school_id, classroom_id, student_id, other_id = populate(client)
+    assert counts(client, school_id, classroom_id, student_id) == (1, 2, 2, 2)
+
+    assignment_id = client.get("/assignment/").json()[0]["id"]
+    assert client.delete(f"/assignment/{assignment_id}").status_code == 204
+    assert client.delete(f"/user/{other_id}").status_code == 204
+    assert counts(client, school_id, classroom_id, student_id) == (1, 1, 1, 1)
+
+
+def test_compact_count_matches_counters(client):
+    populate(client)
+    [school] = client.get("/school/", params={"id_format": "count"}).json()
+    assert school["classrooms"]["count"] == 1
+    assert school["user_accounts"]["count"] == 2
+
+
+def test_recompute_repairs_counters(client, database):
+    school_id, classroom_id, student_id, _ = populate(client)
+    database.execute(update(School).values(classroom_count=9, user_count=9))
+    database.execute(update(Classroom).values(member_count=9))
+    database.execute(update(UserAccount).values(assignment_count=9))
+    database.commit()
+    assert counts(client, school_id, classroom_id, student_id) == (9, 9, 9, 9)
+
+    recompute_counters(database)
+    assert counts(client, school_id, classroom_id, student_id) == (1, 2, 2, 2)
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from sqlalchemy import column, create_engine, event, func, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import config
+from app.app import app
+from app.dependencies import get_database
+from app.slowlog import SlowQueryLog
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    monkeypatch.setattr(config, "DEBUG_TOKEN", "secret")
+    return "secret"
+
+
+def test_debug_routes_need_the_token(client, debug_token):
+    assert client.get("/debug/slow-queries").status_code == 403
+    response = client.get("/debug/slow-queries", headers={"X-Debug-Token": "wrong"})
+    assert response.status_code == 403
+    response = client.get("/debug/slow-queries", headers={"X-Debug-Token": debug_token})
+    assert response.status_code == 200
+
+
+def test_debug_routes_hidden_without_a_token(client):
+    assert client.get("/debug/slow-queries").status_code == 404
+
+
+@pytest.fixture
+def slow_engine():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        # Costs 2 ms per row, paid while the rows are fetched.
+        dbapi_connection.create_function(
+            "slow", 1, lambda value: time.sleep(0.002) or value
+        )
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE item (value INTEGER)"))
+        connection.execute(
+            text("INSERT INTO item VALUES (:value)"),
+            [{"value": value} for value in range(100)],
+        )
+    yield engine
+    engine.dispose()
+
+
+def test_slow_query_log_times_fetching(slow_engine):
+    log = SlowQueryLog(threshold_ms=100, max_statements=10)
+    log.install(slow_engine)
+    with Session(slow_engine) as database:
+        rows = database.execute(
+            select(func.slow(column("value"))).select_from(table("item"))
+        ).all()
+        assert len(rows) == 100
+        database.execute(select(column("value")).select_from(table("item"))).all()
+    [entry] = log.summary()
+    assert entry["statement"] == "SELECT slow(value) AS slow_1 \nFROM item"
+    assert entry["max_ms"] >= 100
+
+
+def test_slow_query_log_survives_failing_statements(slow_engine):
+    log = SlowQueryLog(threshold_ms=50, max_statements=10)
+    log.install(slow_engine)
+    with Session(slow_engine) as database:
+        with pytest.raises(OperationalError):
+            database.execute(text("SELECT * FROM missing"))
+        with slow_engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing"))
+            time.sleep(0.1)
+            # Would be logged if timed from a failed statement's start.
+            connection.execute(text("SELECT 1"))
+        database.execute(text("SELECT 1")).all()
+        assert log.execution.get() is None
+    assert log.summary() == []
+
+
+def test_profiled_request(client, debug_token, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_INTERVAL_MS", 1.0)
+    get_test_database = app.dependency_overrides[get_database]
+
+    def slow_database():
+        # Long enough for the sampler to take samples.
+        time.sleep(0.05)
+        yield from get_test_database()
+
+    monkeypatch.setitem(app.dependency_overrides, get_database, slow_database)
+    response = client.get("/school/", headers={"X-Profile": debug_token})
+    profile_id = response.headers["X-Profile-Id"]
+    monkeypatch.setitem(app.dependency_overrides, get_database, get_test_database)
+    assert "X-Profile-Id" not in client.get("/school/").headers
+
+    headers = {"X-Debug-Token": debug_token}
+    profiles = client.get("/debug/profiles", headers=headers).json()
+    assert profiles[0]["id"] == int(profile_id)
+    assert profiles[0]["route"] == "GET /school/"
+    assert profiles[0]["samples"] > 0
+    response = client.get(f"/debug/profiles/{profile_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert response.text.strip()
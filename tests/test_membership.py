@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import insert
+
+from app.db import classroom_user_account_table
+from app.membership import membership_index
+
+NOT_ENROLLED = "Student is not enrolled in the classroom"
+
+
+@pytest.fixture
+def classroom(client):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    users = {
+        name: client.post(
+            "/user/",
+            json={
+                "name": name,
+                "email": f"{name}@test.example",
+                "is_student": name != "teacher",
+                "school_id": school["id"],
+                "classrooms": [classroom["id"]] if name != "outsider" else [],
+            },
+        ).json()["id"]
+        for name in ("student", "teacher", "outsider")
+    }
+    return classroom["id"], users
+
+
+def submit(client, classroom_id, student_id):
+    return client.post(
+        "/assignment/",
+        json={
+            "title": "Essay",
+            "body": "text",
+            "classroom_id": classroom_id,
+            "student_id": student_id,
+        },
+    )
+
+
+def test_enrolled_student_can_submit(client, classroom):
+    classroom_id, users = classroom
+    assert submit(client, classroom_id, users["student"]).status_code == 200
+
+
+@pytest.mark.parametrize("user", ["teacher", "outsider"])
+def test_others_are_rejected_with_a_reason(client, classroom, user):
+    classroom_id, users = classroom
+    response = submit(client, classroom_id, users[user])
+    assert response.status_code == 400
+    assert response.json() == {"detail": NOT_ENROLLED}
+
+
+def test_moving_to_another_classroom_is_checked(client, classroom):
+    classroom_id, users = classroom
+    assignment = submit(client, classroom_id, users["student"]).json()
+    response = client.patch(
+        f"/assignment/{assignment['id']}", json={"student_id": users["teacher"]}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": NOT_ENROLLED}
+
+
+def test_index_follows_membership_writes(client, classroom):
+    classroom_id, users = classroom
+    client.patch(
+        f"/classroom/{classroom_id}", json={"user_accounts": [users["outsider"]]}
+    )
+    assert membership_index.is_student(classroom_id, users["outsider"])
+    assert not membership_index.is_student(classroom_id, users["student"])
+    assert submit(client, classroom_id, users["student"]).status_code == 400
+    assert submit(client, classroom_id, users["outsider"]).status_code == 200
+
+    client.delete(f"/user/{users['outsider']}")
+    assert not membership_index.is_member(classroom_id, users["outsider"])
+
+
+def test_membership_written_elsewhere_is_accepted(client, database, classroom):
+    classroom_id, users = classroom
+    # As another worker or a restore would: behind this process's index.
+    database.execute(
+        insert(classroom_user_account_table),
+        [{"classroom_id": classroom_id, "user_account_id": users["outsider"]}],
+    )
+    database.commit()
+    assert not membership_index.is_student(classroom_id, users["outsider"])
+
+    assert submit(client, classroom_id, users["outsider"]).status_code == 200
+    assert membership_index.is_student(classroom_id, users["outsider"])
@@ -0,0 +1,47 @@
+def create_school(client):
+    school = client.post("/school/", json={"name": "School"}).json()
+    classroom = client.post(
+        "/classroom/", json={"name": "Classroom", "school_id": school["id"]}
+    ).json()
+    client.post(
+        "/user/",
+        json={
+            "name": "Student",
+            "email": "student@test.example",
+            "school_id": school["id"],
+            "classrooms": [classroom["id"]],
+        },
+    )
+    return school
+
+
+def test_school_is_publicly_cacheable(client):
+    school = create_school(client)
+    response = client.get(f"/school/{school['id']}")
+    assert response.headers["Cache-Control"] == "public, max-age=3600"
+
+
+def test_tree_is_not_stored_by_shared_caches(client):
+    school = create_school(client)
+    response = client.get(f"/school/{school['id']}/tree")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-store"
+    [classroom] = response.json()["classrooms"]
+    assert [member["email"] for member in classroom["members"]] == [
+        "student@test.example"
+    ]
+
+
+def test_tree_not_found(client):
+    assert client.get("/school/999/tree").status_code == 404
+
+
+def test_negotiated_encodings_vary_on_accept(client):
+    school = create_school(client)
+    plain = client.get(f"/school/{school['id']}")
+    compact = client.get(
+        f"/school/{school['id']}", headers={"Accept": "application/json; ids=ranges"}
+    )
+    assert plain.json() != compact.json()
+    for response in (plain, compact, client.get("/school/")):
+        assert "Accept" in response.headers["Vary"].split(", ")